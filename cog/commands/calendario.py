@@ -4,13 +4,19 @@ from discord import app_commands
 from dotenv import load_dotenv
 import os
 import importlib
+import pickle
 import sys
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 import pytz
-import requests
-from icalendar import Calendar
+import aiohttp
 from typing import List, Dict
 import asyncio
+from core.calendar_index import EventIndex
+from core.calendar_search import SearchIndex
+from core.ical import CalendarInfo, Event, parse_feed
+from core.recurrence import Series, local_rule
+from core.reminders import ReminderQueue
 
 # Grupo de comandos de calendario
 calendario_group = app_commands.Group(
@@ -19,10 +25,23 @@ calendario_group = app_commands.Group(
     default_permissions=None
 )
 
+# Instantánea en disco de los eventos ya parseados (arranque en caliente)
+CALENDAR_SNAPSHOT_FILE = os.getenv("CALENDAR_SNAPSHOT_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "calendar_snapshot.pkl"))
+SNAPSHOT_FORMAT = 3
+
+# Avisos de eventos próximos (0 = desactivados) y con cuántos minutos de antelación
+CHANNEL_CALENDAR_REMINDERS_ID = int(os.getenv("CHANNEL_CALENDAR_REMINDERS_ID", "0"))
+CALENDAR_REMINDER_MINUTES = int(os.getenv("CALENDAR_REMINDER_MINUTES", "30"))
+
 class CalendarSync:
-    def __init__(self):
+    def __init__(self, snapshot_path: str = None, reminder_lead: int = None):
+        self.snapshot_path = snapshot_path
         self.timezone = pytz.timezone('Europe/Madrid')
-        self.events = []
+        self.index = EventIndex()
+        self.search_index = SearchIndex()
+        # Cola de avisos (solo si hay canal de avisos), al día con cada sincronización
+        self.reminders = ReminderQueue(reminder_lead, self.index.overrides) if reminder_lead is not None else None
+        self._stats_cache = None
         self.last_sync = None
         self.calendars = {
             'moodle': {
@@ -38,144 +57,382 @@ class CalendarSync:
                 'emoji': "📅"
             }
         }
-    
-    async def sync_events(self) -> List[Dict]:
-        """Sincronización con todos los calendarios - CON MANEJO DE ERRORES MEJORADO"""
-        from datetime import timedelta
-        now = datetime.now()
-        if self.last_sync and (now - self.last_sync).total_seconds() < 300:  # 5 minutos de cache
-            print(f"🔄 Usando caché (sincronizado hace {(now - self.last_sync).total_seconds():.0f} segundos)")
-            return self.events
+        # Descriptor compartido por todos los eventos de cada calendario
+        self.sources = {
+            calendar_id: CalendarInfo(calendar_id, info['name'], info['color'], info['emoji'])
+            for calendar_id, info in self.calendars.items()
+        }
+        # Por calendario: {clave: (versión, evento)} y validadores HTTP (ETag / Last-Modified)
+        self.calendar_events = {}
+        self.validators = {}
+        self._session = None
+
+        # Sincronización compartida: una sola en curso, los demás la esperan
+        self.ttl = 300  # 5 minutos de cache
+        self._refresh_task = None
+
+        # Contadores de descargas
+        self.downloads = 0
+        self.not_modified = 0
+
+    # ============ INSTANTÁNEA EN DISCO ============
+    def _write_snapshot(self, snapshot):
+        # Escritura atómica: nunca queda un archivo a medias
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.snapshot_path)
+
+    def _read_snapshot(self):
+        with open(self.snapshot_path, "rb") as f:
+            return pickle.load(f)
+
+    async def save_snapshot(self):
+        """Guarda eventos parseados, validadores HTTP y hora de sincronización"""
+        if not self.snapshot_path:
+            return
+        snapshot = {
+            'format': SNAPSHOT_FORMAT,
+            'last_sync': self.last_sync,
+            'calendars': {
+                calendar_id: {
+                    'url': self.calendars[calendar_id]['url'],
+                    'entries': entries,
+                    'validators': self.validators.get(calendar_id)
+                }
+                for calendar_id, entries in self.calendar_events.items()
+                if calendar_id in self.calendars
+            }
+        }
+        try:
+            await asyncio.to_thread(self._write_snapshot, snapshot)
+        except Exception as e:
+            print(f"❌ Error al guardar la instantánea del calendario: {e}")
+
+    async def load_snapshot(self):
+        """Carga la instantánea del disco para responder antes de la primera descarga"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            snapshot = await asyncio.to_thread(self._read_snapshot)
+            if snapshot.get('format') != SNAPSHOT_FORMAT:
+                print("⚠️  Instantánea del calendario con formato antiguo, se ignora")
+                return False
+            
+            for calendar_id, data in snapshot['calendars'].items():
+                # Si la URL del calendario cambió, sus datos ya no valen
+                if calendar_id not in self.calendars or data['url'] != self.calendars[calendar_id]['url']:
+                    continue
+                entries = data['entries']
+                # Los eventos vuelven a apuntar al descriptor vivo del calendario
+                source = self.sources[calendar_id]
+                for _, event in entries.values():
+                    if event is not None:
+                        event.source = source
+                self._apply_changes(calendar_id, [
+                    (key, entry[1]) for key, entry in entries.items() if entry[1] is not None
+                ], [])
+                self.calendar_events[calendar_id] = entries
+                if data['validators']:
+                    self.validators[calendar_id] = data['validators']
             
+            self.last_sync = snapshot['last_sync']
+            print(f"✅ Instantánea del calendario cargada ({len(self.events)} eventos)")
+            return True
+        except Exception as e:
+            print(f"❌ Error al cargar la instantánea del calendario: {e}")
+            return False
+
+    @property
+    def events(self) -> List[Event]:
+        """Todos los eventos, ordenados por inicio"""
+        return self.index.events
+
+    def _get_session(self):
+        """Sesión HTTP compartida (pool de conexiones con keep-alive)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(limit=10)
+            )
+        return self._session
+
+    async def close(self):
+        """Cierra la sesión HTTP"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _fetch_calendar(self, calendar_id: str, calendar_info: Dict):
+        """Descarga un feed con GET condicional.
+
+        Devuelve (contenido, validadores), o (None, None) si el servidor
+        responde 304 y el feed no ha cambiado desde la última descarga.
+        """
+        headers = {}
+        validators = self.validators.get(calendar_id, {})
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        async with self._get_session().get(calendar_info['url'], headers=headers) as response:
+            if response.status == 304:
+                self.not_modified += 1
+                return None, None
+            response.raise_for_status()
+            content = await response.read()
+            self.downloads += 1
+            return content, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+
+    def refresh(self) -> asyncio.Task:
+        """Lanza una sincronización, o devuelve la que ya está en curso (single-flight)"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._sync())
+        return self._refresh_task
+
+    async def sync_events(self) -> List[Event]:
+        """Eventos de todos los calendarios, servidos desde memoria.
+
+        Si aún no hay datos, espera a la sincronización en curso (la misma
+        para todos los comandos que llegan a la vez). Si los datos tienen más
+        de `ttl` segundos, responde con ellos y actualiza en segundo plano.
+        """
+        if self.last_sync is None:
+            # shield: si se cancela un comando, la sincronización compartida sigue
+            return await asyncio.shield(self.refresh())
+        if (datetime.now() - self.last_sync).total_seconds() >= self.ttl:
+            self.refresh()
+        return self.events
+
+    async def _sync(self) -> List[Event]:
+        """Sincronización con todos los calendarios a la vez, con GET condicional"""
+        now = datetime.now()
         print("🔄 Sincronizando calendarios...")
-        all_events = []
+        calendars = {calendar_id: info for calendar_id, info in self.calendars.items() if info['url']}
+        results = await asyncio.gather(
+            *(self._fetch_calendar(calendar_id, info) for calendar_id, info in calendars.items()),
+            return_exceptions=True
+        )
         sync_success = False
+        changed = False
         
-        for calendar_id, calendar_info in self.calendars.items():
+        for (calendar_id, calendar_info), result in zip(calendars.items(), results):
             try:
-                print(f"  📥 Descargando {calendar_info['name']}...")
-                response = requests.get(calendar_info['url'], timeout=30)
-                response.raise_for_status()
+                if isinstance(result, Exception):
+                    raise result
+                content, validators = result
+                if content is None:
+                    # 304: el feed no ha cambiado, se conservan los eventos sin volver a parsear
+                    print(f"  ✅ {calendar_info['name']} sin cambios")
+                    sync_success = True
+                    continue
                 
-                calendar_data = Calendar.from_ical(response.content)
-                calendar_events = []
-                
-                for component in calendar_data.walk():
-                    if component.name == "VEVENT":
-                        event = self._parse_event(component, calendar_id, calendar_info['name'])
-                        if event:
-                            calendar_events.append(event)
-                
-                all_events.extend(calendar_events)
-                print(f"  ✅ {len(calendar_events)} eventos de {calendar_info['name']}")
+                # Parseo en un hilo aparte; solo se construyen los eventos nuevos o modificados
+                entries, added, removed = await asyncio.to_thread(
+                    parse_feed, content, self.calendar_events.get(calendar_id, {}),
+                    lambda component, source=self.sources[calendar_id]: self._parse_event(component, source)
+                )
+                self._apply_changes(calendar_id, added, removed)
+                self.calendar_events[calendar_id] = entries
+                # Los validadores solo se guardan si el feed se parseó bien
+                self.validators[calendar_id] = validators
+                changed = True
+                print(f"  ✅ {len(entries)} eventos de {calendar_info['name']} "
+                      f"({len(added)} nuevos o modificados, {len(removed)} sustituidos o eliminados)")
                 sync_success = True
                 
             except Exception as e:
                 print(f"  ❌ Error sincronizando {calendar_info['name']}: {e}")
                 # Si hay error, usamos eventos existentes de este calendario
-                existing_events = [e for e in self.events if e['calendar'] == calendar_id]
-                all_events.extend(existing_events)
+                existing_events = self.calendar_events.get(calendar_id, {})
                 print(f"  🔄 Usando {len(existing_events)} eventos en caché para {calendar_info['name']}")
         
         if sync_success or not self.events:
-            all_events.sort(key=lambda x: x['start'])
-            self.events = all_events
             self.last_sync = now
+            if changed:
+                await self.save_snapshot()
             print(f"📊 Sincronización completada. Total eventos: {len(self.events)}")
         else:
             print("⚠️  No se pudo sincronizar, usando caché existente")
             
         return self.events
     
-    def _parse_event(self, event_component, calendar_id: str, calendar_name: str):
-        """Parsea eventos individuales con mejor manejo de errores"""
+    def _apply_changes(self, calendar_id: str, added, removed):
+        """Actualiza los índices solo con los eventos que cambiaron"""
+        for key, event in removed:
+            self.index.remove(event)
+            self.search_index.remove((calendar_id, key))
+        for key, event in added:
+            self.index.add(event)
+            self.search_index.add((calendar_id, key), event)
+
+        if self.reminders is not None:
+            now = time.time()
+            for key, _ in removed:
+                self.reminders.remove((calendar_id, key))
+            for key, event in added:
+                self.reminders.schedule((calendar_id, key), event, now)
+
+    @staticmethod
+    def _text(event_component, name: str, default: str = '') -> str:
+        """Texto de una propiedad, sin crear cadenas nuevas cuando está vacía"""
+        value = event_component.get(name)
+        return str(value) if value else default
+
+    def _localize(self, value):
+        """DTSTART/DTEND/RECURRENCE-ID → datetime con zona (las fechas sin hora empiezan a las 00:00)"""
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, datetime.min.time())
+        if value.tzinfo is None:
+            value = self.timezone.localize(value)
+        return value
+
+    def _dates(self, event_component, name: str, tz) -> List[datetime]:
+        """Fechas de RDATE/EXDATE como hora local sin zona (pueden venir en varias líneas)"""
+        values = event_component.get(name)
+        if values is None:
+            return []
+        if not isinstance(values, list):
+            values = [values]
+        dates = []
+        for value in values:
+            for item in value.dts:
+                date = self._localize(item.dt)
+                dates.append(date.astimezone(tz).replace(tzinfo=None))
+        return dates
+
+    def _parse_event(self, event_component, source: CalendarInfo):
+        """Parsea un VEVENT: evento suelto, evento de día completo o serie recurrente"""
         try:
-            start_dt = event_component.get('dtstart').dt
-            end_dt = event_component.get('dtend').dt
-            
-            # Manejar diferentes tipos de fecha/hora
-            if not isinstance(start_dt, datetime):
-                return None
-                
-            if start_dt.tzinfo is None:
-                start_dt = self.timezone.localize(start_dt)
-            if isinstance(end_dt, datetime) and end_dt.tzinfo is None:
-                end_dt = self.timezone.localize(end_dt)
+            start_value = event_component.get('dtstart').dt
+            all_day = not isinstance(start_value, datetime)
+            start_dt = self._localize(start_value)
+
+            end = event_component.get('dtend')
+            if end is not None:
+                end_dt = self._localize(end.dt)
+            else:
+                end_dt = start_dt + timedelta(days=1) if all_day else start_dt
+
+            recurrence = event_component.get('recurrence-id')
             
-            return {
-                'summary': str(event_component.get('summary', 'Sin título')),
-                'description': str(event_component.get('description', '')),
-                'start': start_dt,
-                'end': end_dt,
-                'location': str(event_component.get('location', '')),
-                'url': str(event_component.get('url', '')),
-                'uid': str(event_component.get('uid', '')),
-                'calendar': calendar_id,
-                'calendar_name': calendar_name,
-                'color': self.calendars[calendar_id]['color'],
-                'emoji': self.calendars[calendar_id]['emoji']
-            }
+            # Títulos y lugares se repiten mucho (asignaturas, aulas): se internan
+            event = Event(
+                summary=sys.intern(self._text(event_component, 'summary', 'Sin título')),
+                description=self._text(event_component, 'description'),
+                start=start_dt,
+                end=end_dt,
+                location=sys.intern(self._text(event_component, 'location')),
+                url=self._text(event_component, 'url'),
+                uid=self._text(event_component, 'uid'),
+                source=source,
+                all_day=all_day,
+                recurrence_id=self._localize(recurrence.dt).timestamp() if recurrence is not None else None
+            )
+
+            # Evento recurrente: se guarda la regla y se expande bajo demanda
+            rules = event_component.get('rrule')
+            if rules is None and event_component.get('rdate') is None:
+                return event
+            if rules is None:
+                rules = []
+            elif not isinstance(rules, list):
+                rules = [rules]
+            tz = start_dt.tzinfo
+            return Series(
+                event,
+                rules=[local_rule(rule.to_ical().decode(), tz) for rule in rules],
+                rdates=self._dates(event_component, 'rdate', tz),
+                exdates=self._dates(event_component, 'exdate', tz)
+            )
         except Exception as e:
             print(f"⚠️  Error parseando evento: {e}")
             return None
 
-    def get_events_by_calendar(self, calendar_id: str, days: int = 30) -> List[Dict]:
+    def day_bounds(self, day):
+        """(inicio, fin) de un día en la zona horaria del calendario"""
+        start = self.timezone.localize(datetime.combine(day, datetime.min.time()))
+        return start, self.timezone.localize(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+
+    def get_events_between(self, start: datetime, end: datetime = None, calendar_id: str = None,
+                           include_start: bool = True) -> List[Event]:
+        """Eventos con inicio entre `start` y `end` (bisect sobre el índice)"""
+        return self.index.between(start, end, calendar_id, include_start)
+
+    def search(self, query: str, limit: int = None) -> List[Event]:
+        """Busca eventos por palabras (sin tildes, por prefijo), ordenados por relevancia"""
+        # De una serie se muestra su próxima ocurrencia (o la primera si ya terminó)
+        now = datetime.now(self.timezone).timestamp()
+        return [
+            (result.next_occurrence(now, self.index.overrides(result)) or result.template)
+            if isinstance(result, Series) else result
+            for result in self.search_index.search(query, limit)
+        ]
+
+    def get_events_by_calendar(self, calendar_id: str, days: int = 30) -> List[Event]:
         """Obtiene eventos de un calendario específico"""
-        from datetime import timedelta
         now = datetime.now(self.timezone)
-        future_date = now + timedelta(days=days)
-        
-        return [e for e in self.events 
-                if e['calendar'] == calendar_id and now <= e['start'] <= future_date]
+        return self.index.between(now, now + timedelta(days=days), calendar_id)
 
-    def get_events_today(self) -> List[Dict]:
+    def get_events_today(self) -> List[Event]:
         """Eventos de hoy"""
-        today = datetime.now(self.timezone).date()
-        return [e for e in self.events if e['start'].date() == today]
+        start, end = self.day_bounds(datetime.now(self.timezone).date())
+        return self.index.between(start, end - timedelta(microseconds=1))
 
-    def get_events_next_days(self, days: int) -> List[Dict]:
+    def get_events_next_days(self, days: int) -> List[Event]:
         """Eventos próximos en N días"""
-        from datetime import timedelta
         now = datetime.now(self.timezone)
-        future_date = now + timedelta(days=days)
-        
-        return [e for e in self.events if now <= e['start'] <= future_date]
+        return self.index.between(now, now + timedelta(days=days))
 
-    def get_future_events(self, after_days: int = 30) -> List[Dict]:
+    def get_future_events(self, after_days: int = 30) -> List[Event]:
         """Eventos futuros (después de N días)"""
-        from datetime import timedelta
         future_date = datetime.now(self.timezone) + timedelta(days=after_days)
-        return [e for e in self.events if e['start'] > future_date]
+        return self.index.between(future_date, include_lo=False)
 
     def get_calendar_stats(self) -> Dict:
-        """Obtiene estadísticas del calendario"""
-        from datetime import timedelta
-        now = datetime.now(self.timezone)
+        """Obtiene estadísticas del calendario (conteos por bisect, memorizados por minuto)"""
+        now = datetime.now(self.timezone).replace(second=0, microsecond=0)
+        key = (self.index.version, now)
+        if self._stats_cache and self._stats_cache[0] == key:
+            return self._stats_cache[1]
+        
+        index = self.index
+        day_start, day_end = self.day_bounds(now.date())
+        day_end -= timedelta(microseconds=1)
+        week = now + timedelta(days=7)
         
         calendar_stats = {}
         for calendar_id in self.calendars:
-            calendar_events = [e for e in self.events if e['calendar'] == calendar_id]
             calendar_stats[calendar_id] = {
-                'total': len(calendar_events),
-                'today': len([e for e in calendar_events if e['start'].date() == now.date()]),
-                'next_7_days': len([e for e in calendar_events if now <= e['start'] <= (now + timedelta(days=7))]),
+                'total': index.calendar_size(calendar_id),
+                'today': index.count(day_start, day_end, calendar_id),
+                'next_7_days': index.count(now, week, calendar_id),
             }
         
-        return {
-            'total': len(self.events),
-            'today': len(self.get_events_today()),
-            'next_7_days': len(self.get_events_next_days(7)),
-            'next_30_days': len(self.get_events_next_days(30)),
-            'future': len(self.get_future_events(30)),
+        stats = {
+            'total': len(index),
+            'today': index.count(day_start, day_end),
+            'next_7_days': index.count(now, week),
+            'next_30_days': index.count(now, now + timedelta(days=30)),
+            'future': index.count(now + timedelta(days=30), include_lo=False),
             'last_sync': self.last_sync.strftime('%d/%m/%Y %H:%M') if self.last_sync else "Nunca",
             'calendars': calendar_stats
         }
+        self._stats_cache = (key, stats)
+        return stats
 
 class CalendarioCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.calendar_sync = CalendarSync()
+        reminder_lead = CALENDAR_REMINDER_MINUTES * 60 if CHANNEL_CALENDAR_REMINDERS_ID else None
+        self.calendar_sync = CalendarSync(CALENDAR_SNAPSHOT_FILE, reminder_lead)
         self.loaded_commands = []
+        self._reminder_task = None
 
     async def load_calendario_commands(self):
         """Carga automáticamente todos los comandos de la carpeta calendario"""
@@ -214,11 +471,68 @@ class CalendarioCog(commands.Cog):
     async def on_ready(self):
         """Cuando el cog está listo - Sincronización inicial"""
         print("🔄 Iniciando sincronización inicial de calendarios...")
-        await self.calendar_sync.sync_events()
+        if self.calendar_sync.events:
+            # Ya hay datos de la instantánea: se actualizan en segundo plano
+            self.calendar_sync.refresh()
+        else:
+            await self.calendar_sync.sync_events()
 
     async def cog_load(self):
         """Cuando el cog se carga"""
+        await self.calendar_sync.load_snapshot()
         await self.load_calendario_commands()
+        if self.calendar_sync.reminders is not None:
+            self._reminder_task = asyncio.create_task(self._reminder_loop())
+
+    async def cog_unload(self):
+        """Cierra la sesión HTTP de los calendarios y para los avisos"""
+        if self._reminder_task is not None:
+            self._reminder_task.cancel()
+        await self.calendar_sync.close()
+
+    # ============ AVISOS ============
+    async def _reminder_loop(self):
+        """Duerme hasta el próximo aviso (o hasta que una sincronización cambie la cola) y lo envía"""
+        await self.bot.wait_until_ready()
+        calendar_sync = self.calendar_sync
+        reminders = calendar_sync.reminders
+        while not self.bot.is_closed():
+            reminders.changed.clear()
+            try:
+                # Los calendarios se mantienen al día aunque nadie use los comandos
+                await calendar_sync.sync_events()
+                for event in reminders.due(time.time()):
+                    await self.send_reminder(event)
+            except Exception as e:
+                print(f"❌ Error en los avisos del calendario: {e}")
+
+            deadline = reminders.next_deadline()
+            timeout = calendar_sync.ttl if deadline is None else min(max(deadline - time.time(), 0), calendar_sync.ttl)
+            try:
+                await asyncio.wait_for(reminders.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def send_reminder(self, event: Event):
+        """Publica el aviso de un evento en el canal de avisos"""
+        channel = self.bot.get_channel(CHANNEL_CALENDAR_REMINDERS_ID)
+        if not channel:
+            print(f"❌ Canal de avisos del calendario no encontrado (ID: {CHANNEL_CALENDAR_REMINDERS_ID})")
+            return
+
+        start = int(event.timestamp)
+        embed = discord.Embed(
+            title=f"⏰ {event.summary}",
+            description=f"{event.emoji} {event.calendar_name}",
+            color=event.color
+        )
+        when = f"📅 {event.start.strftime('%d/%m/%Y')} (todo el día)" if event.all_day else f"<t:{start}:F> (<t:{start}:R>)"
+        embed.add_field(name="Cuándo", value=when, inline=False)
+        if event.location:
+            embed.add_field(name="Lugar", value=event.location, inline=False)
+        if event.url:
+            embed.add_field(name="Enlace", value=event.url, inline=False)
+        await channel.send(embed=embed)
 
     async def ensure_sync(self):
         """Asegura que los calendarios estén sincronizados antes de usar comandos"""
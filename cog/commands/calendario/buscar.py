@@ -7,11 +7,8 @@ async def search_events(interaction: discord.Interaction, calendar_sync, busqued
     # Asegurar sincronización antes de mostrar eventos
     await calendar.sync_events()
     
-    results = []
-    for event in calendar.events:
-        if (busqueda.lower() in event['summary'].lower() or 
-            busqueda.lower() in event['description'].lower()):
-            results.append(event)
+    # Índice invertido: sin tildes ni mayúsculas, cada palabra como prefijo
+    results = calendar.search(busqueda)
     
     if not results:
         embed = discord.Embed(
@@ -30,11 +27,11 @@ async def search_events(interaction: discord.Interaction, calendar_sync, busqued
     )
     
     for event in results[:6]:
-        emoji = "📚" if event['calendar'] == 'moodle' else "📝"
-        date_str = event['start'].strftime('%d/%m/%Y %H:%M')
+        emoji = "📚" if event.calendar == 'moodle' else "📝"
+        date_str = event.start.strftime('%d/%m/%Y %H:%M')
         embed.add_field(
-            name=f"{emoji} {event['summary']}",
-            value=f"**Fecha:** {date_str}\n**Calendario:** {event['calendar_name']}",
+            name=f"{emoji} {event.summary}",
+            value=f"**Fecha:** {date_str}\n**Calendario:** {event.calendar_name}",
             inline=False
         )
     
@@ -8,10 +8,13 @@ async def send_events_embed(interaction: discord.Interaction, calendar_sync):
     # Asegurar sincronización antes de mostrar eventos
     await calendar.sync_events()
     
-    # Obtener eventos
+    # Obtener eventos: rangos disjuntos del índice temporal
+    now = datetime.now(calendar.timezone)
+    tomorrow, _ = calendar.day_bounds(now.date() + timedelta(days=1))
+    week_end = now + timedelta(days=7)
     today_events = calendar.get_events_today()
-    week_events = calendar.get_events_next_days(7)
-    month_events = calendar.get_events_next_days(30)
+    week_events_filtered = calendar.get_events_between(tomorrow, week_end)
+    month_events_filtered = calendar.get_events_between(week_end, now + timedelta(days=30), include_start=False)
     future_events = calendar.get_future_events(30)
     stats = calendar.get_calendar_stats()
     
@@ -28,8 +31,8 @@ async def send_events_embed(interaction: discord.Interaction, calendar_sync):
     if today_events:
         today_text = ""
         for event in today_events[:8]:
-            emoji = "📚" if event['calendar'] == 'moodle' else "📝"
-            today_text += f"{emoji} **{event['start'].strftime('%H:%M')}** - {event['summary']}\n"
+            emoji = "📚" if event.calendar == 'moodle' else "📝"
+            today_text += f"{emoji} **{event.time_label}** - {event.summary}\n"
         if len(today_events) > 8:
             today_text += f"*... y {len(today_events) - 8} más*"
     else:
@@ -41,13 +44,12 @@ async def send_events_embed(interaction: discord.Interaction, calendar_sync):
         inline=False
     )
     
-    # Próximos 7 días
-    week_events_filtered = [e for e in week_events if e not in today_events]
+    # Próximos 7 días (sin los de hoy)
     if week_events_filtered:
         week_text = ""
         for event in week_events_filtered[:6]:
-            emoji = "📚" if event['calendar'] == 'moodle' else "📝"
-            week_text += f"{emoji} **{event['start'].strftime('%a %d/%m %H:%M')}** - {event['summary']}\n"
+            emoji = "📚" if event.calendar == 'moodle' else "📝"
+            week_text += f"{emoji} **{event.start.strftime('%a %d/%m %H:%M')}** - {event.summary}\n"
         if len(week_events_filtered) > 6:
             week_text += f"*... y {len(week_events_filtered) - 6} más*"
     else:
@@ -59,13 +61,12 @@ async def send_events_embed(interaction: discord.Interaction, calendar_sync):
         inline=False
     )
     
-    # Próximos 30 días
-    month_events_filtered = [e for e in month_events if e not in week_events]
+    # Próximos 30 días (sin los de la semana)
     if month_events_filtered:
         month_text = ""
         for event in month_events_filtered[:5]:
-            emoji = "📚" if event['calendar'] == 'moodle' else "📝"
-            month_text += f"{emoji} **{event['start'].strftime('%d/%m')}** - {event['summary']}\n"
+            emoji = "📚" if event.calendar == 'moodle' else "📝"
+            month_text += f"{emoji} **{event.start.strftime('%d/%m')}** - {event.summary}\n"
         if len(month_events_filtered) > 5:
             month_text += f"*... y {len(month_events_filtered) - 5} más*"
     else:
@@ -81,8 +82,8 @@ async def send_events_embed(interaction: discord.Interaction, calendar_sync):
     if future_events:
         future_text = f"📊 **Total eventos futuros:** {len(future_events)}"
         for event in future_events[:2]:
-            emoji = "📚" if event['calendar'] == 'moodle' else "📝"
-            future_text += f"\n{emoji} **{event['start'].strftime('%d/%m/%Y')}** - {event['summary']}"
+            emoji = "📚" if event.calendar == 'moodle' else "📝"
+            future_text += f"\n{emoji} **{event.start.strftime('%d/%m/%Y')}** - {event.summary}"
         if len(future_events) > 2:
             future_text += f"\n*... y {len(future_events) - 2} más*"
     else:
@@ -29,8 +29,8 @@ async def send_exams_events(interaction: discord.Interaction, calendar_sync):
     # Agrupar por mes
     events_by_month = {}
     for event in exams_events:
-        month_key = event['start'].strftime('%Y-%m')
-        month_name = event['start'].strftime('%B %Y')
+        month_key = event.start.strftime('%Y-%m')
+        month_name = event.start.strftime('%B %Y')
         if month_name not in events_by_month:
             events_by_month[month_name] = []
         events_by_month[month_name].append(event)
@@ -38,7 +38,7 @@ async def send_exams_events(interaction: discord.Interaction, calendar_sync):
     for month_name, month_events in events_by_month.items():
         month_text = ""
         for event in month_events:
-            days_until = (event['start'].date() - datetime.now().date()).days
+            days_until = (event.start.date() - datetime.now().date()).days
             day_indicator = ""
             if days_until == 0:
                 day_indicator = " 🚨 **HOY**"
@@ -47,7 +47,7 @@ async def send_exams_events(interaction: discord.Interaction, calendar_sync):
             elif days_until <= 7:
                 day_indicator = " 🔔"
             
-            month_text += f"• **{event['start'].strftime('%d/%m')}** {event['start'].strftime('%H:%M')} - {event['summary']}{day_indicator}\n"
+            month_text += f"• **{event.start.strftime('%d/%m')}** {event.start.strftime('%H:%M')} - {event.summary}{day_indicator}\n"
         
         embed.add_field(
             name=f"📅 {month_name}",
@@ -56,8 +56,8 @@ async def send_exams_events(interaction: discord.Interaction, calendar_sync):
         )
     
     # Estadísticas rápidas
-    today_count = len([e for e in exams_events if e['start'].date() == datetime.now().date()])
-    week_count = len([e for e in exams_events if (e['start'].date() - datetime.now().date()).days <= 7])
+    today_count = len([e for e in exams_events if e.start.date() == datetime.now().date()])
+    week_count = len([e for e in exams_events if (e.start.date() - datetime.now().date()).days <= 7])
     
     embed.set_footer(text=f"🔄 Sincronizado | Hoy: {today_count} | Próxima semana: {week_count} | Total: {len(exams_events)}")
     
@@ -20,8 +20,8 @@ async def send_today_events(interaction: discord.Interaction, calendar_sync):
         return
     
     # Separar eventos por calendario
-    moodle_events = [e for e in today_events if e['calendar'] == 'moodle']
-    google_events = [e for e in today_events if e['calendar'] == 'google']
+    moodle_events = [e for e in today_events if e.calendar == 'moodle']
+    google_events = [e for e in today_events if e.calendar == 'google']
     
     embed = discord.Embed(
         title=f"📅 Eventos de Hoy ({len(today_events)})",
@@ -33,8 +33,8 @@ async def send_today_events(interaction: discord.Interaction, calendar_sync):
     if moodle_events:
         moodle_text = ""
         for event in moodle_events:
-            start_time = event['start'].strftime('%H:%M')
-            moodle_text += f"**⏰ {start_time}** - {event['summary']}\n"
+            start_time = event.time_label
+            moodle_text += f"**⏰ {start_time}** - {event.summary}\n"
         embed.add_field(
             name=f"📚 Tareas ({len(moodle_events)})",
             value=moodle_text,
@@ -45,8 +45,8 @@ async def send_today_events(interaction: discord.Interaction, calendar_sync):
     if google_events:
         google_text = ""
         for event in google_events:
-            start_time = event['start'].strftime('%H:%M')
-            google_text += f"**⏰ {start_time}** - {event['summary']}\n"
+            start_time = event.time_label
+            google_text += f"**⏰ {start_time}** - {event.summary}\n"
         embed.add_field(
             name=f"📅 Exámenes ({len(google_events)})",
             value=google_text,
@@ -29,7 +29,7 @@ async def send_tasks_events(interaction: discord.Interaction, calendar_sync):
     # Agrupar por semana
     events_by_week = {}
     for event in tasks_events:
-        week_start = event['start'].date() - timedelta(days=event['start'].weekday())
+        week_start = event.start.date() - timedelta(days=event.start.weekday())
         week_key = week_start.strftime('%Y-%m-%d')
         week_name = f"Semana {week_start.strftime('%d/%m')}"
         if week_name not in events_by_week:
@@ -39,7 +39,7 @@ async def send_tasks_events(interaction: discord.Interaction, calendar_sync):
     for week_name, week_events in list(events_by_week.items())[:6]:
         week_text = ""
         for event in week_events:
-            days_until = (event['start'].date() - datetime.now().date()).days
+            days_until = (event.start.date() - datetime.now().date()).days
             urgency = ""
             if days_until == 0:
                 urgency = " 🚨 **HOY**"
@@ -48,7 +48,7 @@ async def send_tasks_events(interaction: discord.Interaction, calendar_sync):
             elif days_until <= 3:
                 urgency = " 🔔"
             
-            week_text += f"• **{event['start'].strftime('%a %d/%m')}** {event['start'].strftime('%H:%M')} - {event['summary']}{urgency}\n"
+            week_text += f"• **{event.start.strftime('%a %d/%m')}** {event.start.strftime('%H:%M')} - {event.summary}{urgency}\n"
         
         embed.add_field(
             name=f"📅 {week_name}",
@@ -57,8 +57,8 @@ async def send_tasks_events(interaction: discord.Interaction, calendar_sync):
         )
     
     # Estadísticas rápidas
-    today_count = len([e for e in tasks_events if e['start'].date() == datetime.now().date()])
-    urgent_count = len([e for e in tasks_events if (e['start'].date() - datetime.now().date()).days <= 3])
+    today_count = len([e for e in tasks_events if e.start.date() == datetime.now().date()])
+    urgent_count = len([e for e in tasks_events if (e.start.date() - datetime.now().date()).days <= 3])
     
     embed.set_footer(text=f"🔄 Sincronizado | Hoy: {today_count} | Urgentes (≤3 días): {urgent_count} | Total: {len(tasks_events)}")
     
@@ -2,64 +2,14 @@ import discord
 from discord import app_commands
 import os
 import time
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Inicializar cliente de Supabase
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
-
 # Configuración
-INITIAL_BALANCE = 500
 CHANNEL_LEADERBOARD_ID = int(os.getenv("CHANNEL_LEADERBOARD_ID"))
 
-# Funciones de base de datos locales
-async def get_leaderboard(limit=10):
-    """Obtiene el leaderboard desde Supabase"""
-    try:
-        response = supabase.table("players").select("username, balance").order("balance", desc=True).limit(limit).execute()
-        return response.data if response.data else []
-    except Exception as e:
-        print(f"Error en get_leaderboard: {e}")
-        return []
-
-async def update_global_leaderboard(bot):
-    """Actualiza el leaderboard global en el canal especificado"""
-    channel = bot.get_channel(CHANNEL_LEADERBOARD_ID)
-    if not channel:
-        print("❌ Canal de leaderboard no encontrado")
-        return None
-    
-    try:
-        leaderboard = await get_leaderboard(10)
-        await channel.purge()
-        
-        embed = discord.Embed(title="🏆 TABLA DE LÍDERES GLOBAL", color=discord.Color.gold())
-        
-        if not leaderboard:
-            embed.description = "📭 No hay jugadores registrados todavía."
-        else:
-            for i, player in enumerate(leaderboard[:10], start=1):
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                embed.add_field(
-                    name=f"{medal} {player['username']}", 
-                    value=f"```{player['balance']:,} monedas```", 
-                    inline=False
-                )
-        
-        embed.set_footer(text="Actualizado manualmente por administración")
-        await channel.send(embed=embed)
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error actualizando leaderboard: {e}")
-        return None
-
 def setup_command(sudo_group):
     """Configura el comando leaderboard en el grupo sudo"""
     
@@ -69,15 +19,13 @@ def setup_command(sudo_group):
         await interaction.response.send_message("🔄 Actualizando leaderboard...", ephemeral=True)
         
         try:
-            # Actualizar leaderboard
-            success = await update_global_leaderboard(interaction.client)
+            # Forzar el refresco sin esperar al intervalo del publicador
+            success = await interaction.client.leaderboard.refresh()
             
             if success:
                 # Obtener información adicional para el admin
-                leaderboard_data = await get_leaderboard(5)
-                total_response = supabase.table("players").select("balance").execute()
-                total_players = len(total_response.data) if total_response.data else 0
-                total_wealth = sum(p["balance"] for p in total_response.data) if total_response.data else 0
+                leaderboard_data = await interaction.client.db.get_leaderboard(5)
+                stats = interaction.client.ranking.aggregates()
                 
                 # Crear embed de confirmación para el admin
                 embed = discord.Embed(
@@ -99,8 +47,9 @@ def setup_command(sudo_group):
                 embed.add_field(
                     name="📊 Estadísticas",
                     value=(
-                        f"**Jugadores totales:** {total_players}\n"
-                        f"**Riqueza total:** {total_wealth:,} monedas"
+                        f"**Jugadores totales:** {stats['total_players']}\n"
+                        f"**Riqueza total:** {stats['total_wealth']:,} monedas\n"
+                        f"**Promedio por jugador:** {stats['average']:,}"
                     ),
                     inline=True
                 )
@@ -161,7 +110,7 @@ def setup_command_with_check(sudo_group, cog):
         await interaction.response.send_message("🔄 Actualizando leaderboard...", ephemeral=True)
         
         try:
-            success = await update_global_leaderboard(interaction.client)
+            success = await interaction.client.leaderboard.refresh()
             
             if success:
                 embed = discord.Embed(
@@ -4,28 +4,18 @@ from discord import app_commands
 import os
 import importlib
 import sys
-import random
 from datetime import datetime
 from discord.ext import tasks
-from supabase import create_client
 import asyncio
-import json
 from pathlib import Path
-
-# Obtener credenciales de Supabase
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_KEY = os.getenv('SUPABASE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("❌ Faltan variables de entorno SUPABASE_URL o SUPABASE_KEY")
-
-# Inicializar cliente de Supabase
-try:
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("✅ Cliente Supabase inicializado correctamente")
-except Exception as e:
-    print(f"❌ Error al inicializar Supabase: {e}")
-    supabase = None
+from core.candles import CandleBook
+from core.coins import COINS, base_prices
+from core.market import MarketSimulator
+from core.networth import NetWorthIndex
+from core.orders import OrderBook
+from core.prices import PriceOracle
+from core.timeseries import PriceSeries
+import time
 
 # Grupo de comandos de criptomonedas
 crypto_group = app_commands.Group(
@@ -34,211 +24,83 @@ crypto_group = app_commands.Group(
     default_permissions=None
 )
 
-# Configuración de criptomonedas para actualización
-CRYPTO_CONFIG = {
-    "BTC": {
-        "name": "BitCord",
-        "emoji": "₿",
-        "base_price": 10000,
-        "volatility": (0.98, 1.025),
-        "min_price": 1,
-        "max_price": 100000000,
-        "color": 0xF7931A
-    },
-    "ETH": {
-        "name": "Etherium", 
-        "emoji": "Ξ",
-        "base_price": 3000,
-        "volatility": (0.95, 1.055),
-        "min_price": 1,
-        "max_price": 100000000,
-        "color": 0x627EEA
-    },
-    "DOG": {
-        "name": "DoggoCoin",
-        "emoji": "🐕",
-        "base_price": 50,
-        "volatility": (0.85, 1.155),
-        "min_price": 1,
-        "max_price": 100000000,
-        "color": 0xF2A900
-    }
-}
-
-# Diccionario para almacenar precios originales (en memoria temporalmente)
-PRICE_HISTORY_FILE = "crypto_price_history.json"
+# Simulación de mercado (semilla opcional para reproducir una secuencia de ticks)
+MARKET_SEED = int(os.environ["MARKET_SEED"]) if os.getenv("MARKET_SEED") else None
+MARKET_CORRELATION = float(os.getenv("MARKET_CORRELATION", "0"))
 
-def load_price_history():
-    """Carga el historial de precios desde archivo JSON"""
-    try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        history_path = os.path.join(current_dir, PRICE_HISTORY_FILE)
-        
-        if os.path.exists(history_path):
-            with open(history_path, 'r') as f:
-                return json.load(f)
-        else:
-            # Crear estructura inicial
-            history = {
-                "BTC": {"original": 10000, "current": 10000, "change_percent": 0.0},
-                "ETH": {"original": 3000, "current": 3000, "change_percent": 0.0},
-                "DOG": {"original": 50, "current": 50, "change_percent": 0.0}
-            }
-            with open(history_path, 'w') as f:
-                json.dump(history, f, indent=2)
-            return history
-    except Exception as e:
-        print(f"❌ Error al cargar historial de precios: {e}")
-        return {
-            "BTC": {"original": 10000, "current": 10000, "change_percent": 0.0},
-            "ETH": {"original": 3000, "current": 3000, "change_percent": 0.0},
-            "DOG": {"original": 50, "current": 50, "change_percent": 0.0}
-        }
+# Serie temporal de precios (archivo binario de solo anexado)
+PRICE_SERIES_FILE = os.getenv("PRICE_SERIES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "crypto_prices.bin"))
 
-def save_price_history(history):
-    """Guarda el historial de precios en archivo JSON"""
-    try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        history_path = os.path.join(current_dir, PRICE_HISTORY_FILE)
-        
-        with open(history_path, 'w') as f:
-            json.dump(history, f, indent=2)
-    except Exception as e:
-        print(f"❌ Error al guardar historial de precios: {e}")
-
-def update_price_history_sync(crypto, new_price):
-    """Actualiza el historial de precios y calcula el porcentaje de cambio"""
-    history = load_price_history()
-    
-    if crypto not in history:
-        # Si es la primera vez, establecer original y actual
+def build_price_history(candles, prices, now=None):
+    """Cambios por ventana para el oráculo: 24h como cambio principal, más 1h/24h/7d"""
+    now = now or time.time()
+    history = {}
+    for crypto, price in prices.items():
+        windows = candles.summary(crypto, now)
+        day = windows.get("24h")
         history[crypto] = {
-            "original": new_price,
-            "current": new_price,
-            "change_percent": 0.0
+            "change_percent": day["change_percent"] if day else 0.0,
+            "original": int(day["open"]) if day else price,
+            "changes": {label: window["change_percent"] if window else 0.0 for label, window in windows.items()}
         }
-    else:
-        # Obtener precio original (si existe) o usar el actual como original
-        original_price = history[crypto].get("original", new_price)
-        previous_price = history[crypto].get("current", new_price)
-        
-        # Calcular cambio porcentual desde el ORIGINAL (no desde el anterior)
-        change_percent = ((new_price - original_price) / original_price * 100) if original_price > 0 else 0
-        
-        # Si el cambio es muy pequeño (menos de 1%), mantener el precio original
-        # Esto simula que el "precio original" es el de la última variación significativa
-        if abs(change_percent) < 1.0:
-            # No actualizar el precio original, solo el actual
-            history[crypto] = {
-                "original": original_price,
-                "current": new_price,
-                "change_percent": change_percent
-            }
-        else:
-            # Cambio significativo, actualizar ambos
-            history[crypto] = {
-                "original": new_price,  # El nuevo precio se convierte en el "original"
-                "current": new_price,
-                "change_percent": 0.0  # Reiniciar contador
-            }
-    
-    save_price_history(history)
-    return history[crypto]["change_percent"]
+    return history
 
 # ============ FUNCIONES DE LECTURA DE PRECIOS ============
-def get_current_prices_sync():
+async def get_current_prices(db):
     """Obtiene los precios actuales DESDE Supabase (SOLO LECTURA)"""
-    if not supabase:
-        print("❌ Cliente Supabase no inicializado")
-        return {crypto: config["base_price"] for crypto, config in CRYPTO_CONFIG.items()}
-    
     try:
-        response = supabase.table('crypto_current_prices').select('*').execute()
+        prices = await db.get_current_prices()
         
-        if not response.data:
+        if not prices:
             print("⚠️ No hay precios en la base de datos")
-            return {crypto: config["base_price"] for crypto, config in CRYPTO_CONFIG.items()}
-        
-        prices = {}
-        for item in response.data:
-            prices[item['crypto']] = int(item['price'])  # Convertir a ENTERO
+            return base_prices()
         
         # Asegurar que todas las criptomonedas estén presentes
-        for crypto in ["BTC", "ETH", "DOG"]:
+        for crypto, config in COINS.items():
             if crypto not in prices:
                 print(f"⚠️  {crypto} no encontrado en BD, usando valor base")
-                prices[crypto] = CRYPTO_CONFIG[crypto]["base_price"]
+                prices[crypto] = config["base_price"]
         
         return prices
     except Exception as e:
         print(f"❌ Error al obtener precios: {e}")
-        return {crypto: config["base_price"] for crypto, config in CRYPTO_CONFIG.items()}
+        return base_prices()
 
 # ============ FUNCIONES DE ACTUALIZACIÓN DE PRECIOS ============
-def update_crypto_price_sync(crypto, new_price):
-    """Actualiza el precio de una criptomoneda en Supabase"""
-    if not supabase:
-        print("❌ Cliente Supabase no inicializado")
-        return
-    
-    try:
-        # Convertir a entero
-        new_price = int(round(new_price))
-        
-        # Actualizar la tabla de precios actuales
-        supabase.table('crypto_current_prices').update({
-            'price': new_price,
-            'last_update': datetime.now().isoformat()
-        }).eq('crypto', crypto).execute()
-        
-        return new_price
-        
-    except Exception as e:
-        print(f"❌ Error al actualizar precio {crypto}: {e}")
-        return None
+async def update_prices(db, oracle, series, market, candles):
+    """Ejecuta un tick de precios.
 
-def update_prices_sync():
-    """Actualiza todos los precios según volatilidad, partiendo de los precios existentes"""
-    if not supabase:
-        print("❌ Cliente Supabase no inicializado")
-        return get_current_prices_sync()
-    
+    Calcula los nuevos precios de todas las monedas con un paso vectorizado
+    del simulador, los guarda en Supabase con una única petición (RPC
+    `record_price_tick`), los anexa a la serie temporal en un hilo aparte,
+    actualiza las velas y los publica en el oráculo. Devuelve los precios.
+    """
+    started = time.perf_counter()
     try:
-        # LEER precios actuales de la BD
-        prices = get_current_prices_sync()
+        # Partir de los últimos precios publicados (sin consultar la BD)
+        old_vector = market.to_vector(oracle.prices())
+        new_vector = market.step(old_vector)
+        prices = market.to_dict(new_vector)
         
         changes = {}
-        updated_count = 0
+        for crypto, old, new in zip(market.symbols, old_vector, new_vector):
+            if new != old:
+                changes[crypto] = {
+                    'old': int(old),
+                    'new': int(new),
+                    'change_percent': (new - old) / old * 100
+                }
         
-        for crypto, config in CRYPTO_CONFIG.items():
-            current_price = prices.get(crypto, config["base_price"])
-            
-            # Asegurar que tenemos un precio válido
-            if not current_price or current_price <= 0:
-                current_price = config["base_price"]
-            
-            # Calcular nuevo precio con volatilidad
-            min_vol, max_vol = config["volatility"]
-            change = random.uniform(min_vol, max_vol)
-            new_price = current_price * change
-            
-            # Aplicar límites y convertir a entero
-            new_price = max(config["min_price"], min(config["max_price"], new_price))
-            new_price = int(round(new_price))
-            
-            # Solo actualizar si hay cambio
-            if new_price != current_price:
-                updated_price = update_crypto_price_sync(crypto, new_price)
-                if updated_price:
-                    # Calcular y guardar cambio porcentual en el historial
-                    change_percent = update_price_history_sync(crypto, updated_price)
-                    
-                    changes[crypto] = {
-                        'old': current_price,
-                        'new': updated_price,
-                        'change_percent': change_percent
-                    }
-                    updated_count += 1
+        # Precios actuales + registro histórico en una sola petición
+        if not await db.record_price_tick(prices):
+            # Sin confirmar en la BD no se publica: el oráculo sigue igual que Supabase
+            return oracle.prices()
+        
+        # Un registro por moneda y tick, haya cambiado o no
+        now = time.time()
+        await asyncio.to_thread(series.append, prices, now)
+        candles.add(prices, now)
+        oracle.publish(prices, build_price_history(candles, prices, now))
         
         # Si hubo cambios, mostrar mensaje detallado
         if changes:
@@ -247,35 +109,97 @@ def update_prices_sync():
             print(f"{'='*50}")
             
             for crypto, data in changes.items():
-                emoji = CRYPTO_CONFIG[crypto]["emoji"]
+                emoji = COINS[crypto]["emoji"]
                 change_emoji = "📈" if data['change_percent'] >= 0 else "📉"
                 print(f"{emoji} {crypto}: {data['old']:,} → {data['new']:,} ({data['change_percent']:+.1f}%) {change_emoji}")
             
             print(f"{'='*50}")
-            print(f"✅ {updated_count} de 3 precios actualizados\n")
+            print(f"✅ {len(changes)} de {len(prices)} precios actualizados\n")
         
-        return get_current_prices_sync()
+        return prices
         
     except Exception as e:
         print(f"❌ Error al actualizar precios: {e}")
-        return get_current_prices_sync()
-
-# ============ TAREA DE ACTUALIZACIÓN (CADA 5 MINUTOS) ============
-@tasks.loop(minutes=5)
-async def update_prices_task():
-    """Actualiza precios cada 5 minutos con mensaje detallado"""
-    try:
-        print(f"\n⏰ Iniciando actualización programada ({datetime.now().strftime('%H:%M:%S')})...")
-        prices = update_prices_sync()
-        print(f"✅ Precios actuales: BTC={prices['BTC']:,}, ETH={prices['ETH']:,}, DOG={prices['DOG']:,}")
-    except Exception as e:
-        print(f"❌ Error en tarea de actualización: {e}")
+        return oracle.prices()
+    finally:
+        oracle.record_tick(time.perf_counter() - started)
 
 # ============ COG PRINCIPAL ============
 class CryptoCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.loaded_commands = []
+
+    async def run_tick(self):
+        """Tick completo: nuevos precios, órdenes disparadas y revaluación de todas las wallets"""
+        # Si la carga inicial de órdenes falló se reintenta antes de casar
+        if not self.bot.orders.loaded:
+            await self.bot.orders.load(self.bot.db)
+        prices = await update_prices(
+            self.bot.db, self.bot.prices, self.bot.price_series, self.bot.market, self.bot.candles
+        )
+        await self.settle_orders(prices)
+        await self.revalue_wallets()
+        return prices
+
+    async def settle_orders(self, prices):
+        """Ejecuta las órdenes límite/stop que disparan los nuevos precios.
+
+        Las órdenes disparadas salen del libro en O(k log n) y se liquidan
+        todas con una única petición. Si la petición falla vuelven al libro
+        y se reintentan en el siguiente tick.
+        """
+        book = self.bot.orders
+        started = time.perf_counter()
+        triggered = book.match(prices)
+        if not triggered:
+            return []
+
+        fills = [{"id": order["id"], "price": prices[order["coin"]]} for order in triggered]
+        results = await self.bot.db.settle_orders(fills)
+        if results is None:
+            book.restore(triggered)
+            return []
+
+        book.record_settlement(len(results), time.perf_counter() - started)
+        self.bot.leaderboard.mark_dirty()
+        print(f"📒 {len(results)} órdenes ejecutadas en este tick")
+        return results
+
+    async def revalue_wallets(self):
+        """Revalúa todas las wallets con un único producto matriz de tenencias × vector de precios"""
+        holdings = self.bot.holdings
+        # Sin la carga completa las wallets valdrían 0: se reintenta y, si falla, se conserva el último ranking
+        if not holdings.loaded and not await holdings.load(self.bot.db):
+            return
+        started = time.perf_counter()
+        try:
+            # Copias tomadas en el event loop; el cálculo va a un hilo aparte
+            ids, matrix = self.bot.holdings.snapshot()
+            prices = self.bot.market.to_vector(self.bot.prices.prices())
+            balances = self.bot.ranking.snapshot()
+            if hasattr(self.bot, "orders"):
+                # Lo apartado por órdenes abiertas sigue siendo del usuario
+                ids, matrix, balances = NetWorthIndex.add_reserved(
+                    ids, matrix, balances, self.bot.holdings.symbols, *self.bot.orders.reserved()
+                )
+            crypto, top = await asyncio.to_thread(
+                NetWorthIndex.compute, ids, matrix, prices, balances, self.bot.networth.top_size
+            )
+            self.bot.networth.publish(crypto, top, time.perf_counter() - started)
+        except Exception as e:
+            print(f"❌ Error al revaluar wallets: {e}")
+
+    # ============ TAREA DE ACTUALIZACIÓN (CADA 5 MINUTOS) ============
+    @tasks.loop(minutes=5)
+    async def update_prices_task(self):
+        """Actualiza precios cada 5 minutos con mensaje detallado"""
+        try:
+            print(f"\n⏰ Iniciando actualización programada ({datetime.now().strftime('%H:%M:%S')})...")
+            prices = await self.run_tick()
+            print(f"✅ Precios actuales: {', '.join(f'{crypto}={price:,}' for crypto, price in prices.items())}")
+        except Exception as e:
+            print(f"❌ Error en tarea de actualización: {e}")
         
     async def load_crypto_commands(self):
         """Carga automáticamente todos los comandos de la carpeta crypto"""
@@ -322,19 +246,26 @@ class CryptoCog(commands.Cog):
         """Se ejecuta cuando el cog se carga"""
         print("🔄 Inicializando sistema crypto...")
         
-        # Verificar conexión y precios
+        # Verificar conexión y cargar precios en el oráculo
         try:
-            prices = get_current_prices_sync()
-            print(f"📊 Precios iniciales en BD: BTC={prices['BTC']:,}, ETH={prices['ETH']:,}, DOG={prices['DOG']:,}")
+            await asyncio.to_thread(self.bot.price_series.load)
+            self.bot.candles.load(self.bot.price_series)
+            prices = await get_current_prices(self.bot.db)
+            self.bot.prices.publish(prices, build_price_history(self.bot.candles, prices))
+            print(f"📊 Precios iniciales en BD: {', '.join(f'{crypto}={price:,}' for crypto, price in prices.items())}")
         except Exception as e:
             print(f"⚠️  No se pudieron leer precios iniciales: {e}")
         
+        # Órdenes límite/stop pendientes
+        if not self.bot.orders.loaded:
+            await self.bot.orders.load(self.bot.db)
+        
         # Esperar antes de iniciar la tarea
         await asyncio.sleep(5)
         
         # Iniciar actualización de precios CADA 5 MINUTOS
-        if not update_prices_task.is_running():
-            update_prices_task.start()
+        if not self.update_prices_task.is_running():
+            self.update_prices_task.start()
             print("✅ Tarea de actualización de precios iniciada (cada 5 minutos)")
         
         # Cargar comandos
@@ -344,6 +275,10 @@ class CryptoCog(commands.Cog):
             print(f"✅ Sistema crypto listo. Comandos cargados: {', '.join(self.loaded_commands)}")
         else:
             print("⚠️  Sistema crypto activo pero sin comandos. Añade comandos en cog/economia/crypto/")
+
+    async def cog_unload(self):
+        """Detiene la tarea de actualización al descargar el cog"""
+        self.update_prices_task.cancel()
     
     @commands.Cog.listener()
     async def on_ready(self):
@@ -351,10 +286,21 @@ class CryptoCog(commands.Cog):
         # Opcional: Forzar una actualización inicial
         await asyncio.sleep(10)
         print("🔍 Forzando primera actualización de precios...")
-        update_prices_sync()
+        await self.run_tick()
 
 async def setup(bot):
     """Setup del cog"""
+    # Oráculo de precios compartido por la tarea y los comandos /crypto
+    if not hasattr(bot, "prices"):
+        bot.prices = PriceOracle(base_prices())
+    if not hasattr(bot, "market"):
+        bot.market = MarketSimulator(COINS, seed=MARKET_SEED, correlation=MARKET_CORRELATION)
+    if not hasattr(bot, "price_series"):
+        bot.price_series = PriceSeries(PRICE_SERIES_FILE)
+    if not hasattr(bot, "candles"):
+        bot.candles = CandleBook(COINS)
+    if not hasattr(bot, "orders"):
+        bot.orders = OrderBook(COINS)
     bot.tree.add_command(crypto_group)
     crypto_cog = CryptoCog(bot)
     await bot.add_cog(crypto_cog)
@@ -0,0 +1,33 @@
+import discord
+from discord import app_commands
+from core.orders import BUY
+
+# ============ COMANDO ============
+def setup_command(crypto_group, cog):
+    @crypto_group.command(name="cancelar", description="Cancelar una orden abierta y recuperar lo reservado")
+    @app_commands.describe(orden="ID de la orden (ver /crypto ordenes)")
+    async def cancelar(interaction: discord.Interaction, orden: int):
+        await interaction.response.defer(ephemeral=True)
+
+        book = cog.bot.orders
+        order = book.get(orden)
+        if order is None or order["discord_id"] != str(interaction.user.id):
+            await interaction.followup.send("❌ No tienes ninguna orden abierta con ese ID", ephemeral=True)
+            return
+
+        # Fuera del libro antes de la petición para que el tick no la dispare mientras tanto
+        book.remove(orden)
+        result = await cog.bot.db.cancel_order(orden, str(interaction.user.id))
+        if result is None:
+            book.add(order)
+            await interaction.followup.send("❌ Error al cancelar la orden. Intenta nuevamente en unos momentos.", ephemeral=True)
+            return
+        if result["status"] != "ok":
+            await interaction.followup.send("❌ La orden ya se ejecutó o fue cancelada", ephemeral=True)
+            return
+
+        if order["side"] == BUY:
+            refund = f"{order['reserved']:,} monedas"
+        else:
+            refund = f"{order['amount']:.4f} {order['coin']}"
+        await interaction.followup.send(f"✅ Orden #{orden} cancelada. Se te devolvieron {refund}", ephemeral=True)
@@ -0,0 +1,123 @@
+import discord
+from discord import app_commands
+from datetime import datetime
+from core.coins import COINS, coin_choices
+from core.orders import BUY, SELL, LIMIT, STOP
+
+MAX_OPEN_ORDERS = 10
+
+SIDES = {BUY: "Compra", SELL: "Venta"}
+KINDS = {LIMIT: "Límite", STOP: "Stop"}
+
+# ============ FUNCIONES INDEPENDIENTES ============
+def validate_order(side, kind, price, current_price):
+    """Devuelve un mensaje de error si la orden no tiene sentido con el precio actual, o None"""
+    if side == BUY and kind == STOP:
+        return "❌ Las órdenes stop solo pueden ser de venta (stop-loss)"
+    if side == BUY and price >= current_price:
+        return f"❌ Una compra límite debe estar por debajo del precio actual ({current_price:,}). Para comprar ya usa `/crypto buy`"
+    if side == SELL and kind == LIMIT and price <= current_price:
+        return f"❌ Una venta límite debe estar por encima del precio actual ({current_price:,}). Para vender ya usa `/crypto sell`"
+    if side == SELL and kind == STOP and price >= current_price:
+        return f"❌ Un stop-loss debe estar por debajo del precio actual ({current_price:,})"
+    return None
+
+# ============ COMANDO ============
+def setup_command(crypto_group, cog):
+    @crypto_group.command(name="orden", description="Crear una orden límite o stop que se ejecuta con la actualización de precios")
+    @app_commands.describe(
+        accion="Comprar o vender",
+        tipo="Límite: al alcanzar un precio mejor | Stop: vender si el precio cae hasta el indicado",
+        moneda="Criptomoneda",
+        cantidad="Cantidad de criptomoneda",
+        precio="Precio de disparo en monedas"
+    )
+    @app_commands.choices(
+        accion=[
+            app_commands.Choice(name="Comprar", value=BUY),
+            app_commands.Choice(name="Vender", value=SELL)
+        ],
+        tipo=[
+            app_commands.Choice(name="Límite", value=LIMIT),
+            app_commands.Choice(name="Stop", value=STOP)
+        ],
+        moneda=coin_choices()
+    )
+    async def orden(interaction: discord.Interaction, accion: str, tipo: str, moneda: str, cantidad: float, precio: int):
+        await interaction.response.defer(ephemeral=True)
+
+        if cantidad <= 0 or precio <= 0:
+            await interaction.followup.send("❌ La cantidad y el precio deben ser mayores que 0", ephemeral=True)
+            return
+
+        crypto_symbol = moneda.upper()
+        if crypto_symbol not in COINS:
+            await interaction.followup.send("❌ Criptomoneda no válida", ephemeral=True)
+            return
+
+        book = cog.bot.orders
+        if len(book.orders_of(interaction.user.id)) >= MAX_OPEN_ORDERS:
+            await interaction.followup.send(
+                f"❌ Ya tienes {MAX_OPEN_ORDERS} órdenes abiertas. Cancela alguna con `/crypto cancelar`",
+                ephemeral=True
+            )
+            return
+
+        current_price = cog.bot.prices.price(crypto_symbol) or 0
+        error = validate_order(accion, tipo, precio, current_price)
+        if error:
+            await interaction.followup.send(error, ephemeral=True)
+            return
+
+        db = cog.bot.db
+        # Crea la wallet si no existe (la orden la referencia)
+        if accion == BUY:
+            wallet = await db.get_crypto_wallet(str(interaction.user.id))
+            if wallet is None:
+                await interaction.followup.send("❌ Error al acceder a tu wallet", ephemeral=True)
+                return
+
+        result = await db.place_order(str(interaction.user.id), crypto_symbol, accion, tipo, cantidad, precio)
+        if result is None:
+            await interaction.followup.send("❌ Error al crear la orden. Intenta nuevamente en unos momentos.", ephemeral=True)
+            return
+        if result["status"] == "insufficient_funds":
+            await interaction.followup.send(
+                f"❌ No tienes suficientes monedas para reservar {int(cantidad * precio):,}",
+                ephemeral=True
+            )
+            return
+        if result["status"] == "insufficient_crypto":
+            await interaction.followup.send(
+                f"❌ No tienes {cantidad:.4f} {crypto_symbol} disponibles para vender",
+                ephemeral=True
+            )
+            return
+
+        order = result["order"]
+        book.add(order)
+
+        config = COINS[crypto_symbol]
+        embed = discord.Embed(
+            title=f"📒 ORDEN CREADA | {config['emoji']} {config['name']}",
+            description=f"**{SIDES[accion]} {KINDS[tipo].lower()}** #{order['id']}",
+            color=config["color"]
+        )
+        embed.set_thumbnail(url=config["icon"])
+        embed.add_field(
+            name="📊 Detalles",
+            value=f"**Cantidad:** {cantidad:.4f} {crypto_symbol}\n"
+                  f"**Precio de disparo:** {precio:,} monedas\n"
+                  f"**Precio actual:** {current_price:,} monedas",
+            inline=False
+        )
+        if accion == BUY:
+            reserved = f"**Monedas reservadas:** {order['reserved']:,}\n" \
+                       f"Si se ejecuta por debajo del disparo se te devuelve la diferencia"
+        else:
+            reserved = f"**{crypto_symbol} reservados:** {cantidad:.4f}"
+        embed.add_field(name="🔒 Reserva", value=reserved, inline=False)
+
+        embed.timestamp = datetime.now()
+        embed.set_footer(text="Las órdenes se ejecutan con la actualización de precios (cada 5 minutos)")
+        await interaction.followup.send(embed=embed, ephemeral=True)
@@ -0,0 +1,34 @@
+import discord
+from core.coins import COINS
+from core.orders import BUY, LIMIT
+
+# ============ COMANDO ============
+def setup_command(crypto_group, cog):
+    @crypto_group.command(name="ordenes", description="Ver tus órdenes límite/stop abiertas")
+    async def ordenes(interaction: discord.Interaction):
+        # El libro de órdenes está en memoria: no hace falta consultar Supabase
+        orders = cog.bot.orders.orders_of(interaction.user.id)
+        prices = cog.bot.prices.prices()
+
+        embed = discord.Embed(title="📒 TUS ÓRDENES ABIERTAS", color=0x3498DB)
+
+        if not orders:
+            embed.description = "No tienes órdenes abiertas.\nUsa `/crypto orden` para crear una."
+        else:
+            for order in orders:
+                config = COINS.get(order["coin"], {"emoji": "🪙"})
+                if order["side"] == BUY:
+                    label = "🟢 Compra límite"
+                elif order["kind"] == LIMIT:
+                    label = "🔴 Venta límite"
+                else:
+                    label = "🛑 Stop-loss"
+                embed.add_field(
+                    name=f"#{order['id']} · {label} · {config['emoji']} {order['coin']}",
+                    value=f"**Cantidad:** {order['amount']:.4f}\n"
+                          f"**Disparo:** {order['price']:,} (actual: {prices.get(order['coin'], 0):,})",
+                    inline=False
+                )
+
+        embed.set_footer(text="Cancela una orden con /crypto cancelar <id>")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -1,95 +1,7 @@
 import discord
 from discord import app_commands
-import os
 from datetime import datetime
-from supabase import create_client
-import json
-
-# ============ FUNCIONES INDEPENDIENTES ============
-def get_supabase_client():
-    SUPABASE_URL = os.getenv('SUPABASE_URL')
-    SUPABASE_KEY = os.getenv('SUPABASE_KEY')
-    
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise ValueError("❌ Faltan variables de entorno SUPABASE_URL o SUPABASE_KEY")
-    
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
-
-def get_current_prices():
-    supabase = get_supabase_client()
-    try:
-        response = supabase.table('crypto_current_prices').select('*').execute()
-        
-        if not response.data:
-            return {"BTC": 10000, "ETH": 3000, "DOG": 50}
-        
-        prices = {}
-        for item in response.data:
-            prices[item['crypto']] = int(item['price'])
-        
-        for crypto in ["BTC", "ETH", "DOG"]:
-            if crypto not in prices:
-                prices[crypto] = {"BTC": 10000, "ETH": 3000, "DOG": 50}[crypto]
-        
-        return prices
-    except Exception as e:
-        print(f"❌ Error al obtener precios: {e}")
-        return {"BTC": 10000, "ETH": 3000, "DOG": 50}
-
-def get_price_history():
-    """Obtiene el historial de precios desde archivo JSON"""
-    try:
-        # Buscar el archivo en el directorio correcto
-        import sys
-        import os
-        
-        # Obtener el directorio actual del archivo
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        history_path = os.path.join(current_dir, "..", "crypto_price_history.json")
-        
-        if os.path.exists(history_path):
-            with open(history_path, 'r') as f:
-                return json.load(f)
-        else:
-            # Buscar en el directorio principal
-            main_dir = os.path.join(current_dir, "..", "..")
-            history_path = os.path.join(main_dir, "crypto_price_history.json")
-            if os.path.exists(history_path):
-                with open(history_path, 'r') as f:
-                    return json.load(f)
-            
-            # Si no existe, crear estructura inicial
-            history = {
-                "BTC": {"original": 10000, "current": 10000, "change_percent": 0.0},
-                "ETH": {"original": 3000, "current": 3000, "change_percent": 0.0},
-                "DOG": {"original": 50, "current": 50, "change_percent": 0.0}
-            }
-            return history
-    except Exception as e:
-        print(f"❌ Error al cargar historial de precios: {e}")
-        return {
-            "BTC": {"original": 10000, "current": 10000, "change_percent": 0.0},
-            "ETH": {"original": 3000, "current": 3000, "change_percent": 0.0},
-            "DOG": {"original": 50, "current": 50, "change_percent": 0.0}
-        }
-
-def get_current_prices_with_change():
-    """Obtiene precios actuales junto con porcentaje de cambio"""
-    current_prices = get_current_prices()
-    history = get_price_history()
-    
-    result = {}
-    for crypto in ["BTC", "ETH", "DOG"]:
-        current_price = current_prices.get(crypto, 0)
-        crypto_history = history.get(crypto, {})
-        
-        result[crypto] = {
-            'price': current_price,
-            'change_percent': crypto_history.get('change_percent', 0.0),
-            'original': crypto_history.get('original', current_price)
-        }
-    
-    return result
+from core.coins import COINS, coin_choices
 
 # ============ COMANDO PRECIO MEJORADO ============
 def setup_command(crypto_group, cog):
@@ -97,54 +9,23 @@ def setup_command(crypto_group, cog):
     @app_commands.describe(
         moneda="Criptomoneda específica (opcional)"
     )
-    @app_commands.choices(
-        moneda=[
-            app_commands.Choice(name="BitCord (BTC)", value="BTC"),
-            app_commands.Choice(name="Etherium (ETH)", value="ETH"),
-            app_commands.Choice(name="DoggoCoin (DOG)", value="DOG")
-        ]
-    )
+    @app_commands.choices(moneda=coin_choices())
     async def precio(interaction: discord.Interaction, moneda: str):
         """Muestra el precio actual de criptomonedas con porcentaje de cambio"""
         await interaction.response.defer()
         
         # Obtener precios con cambios porcentuales
-        prices_data = get_current_prices_with_change()
-        
-        # Configuraciones de criptomonedas
-        configs = {
-            "BTC": {
-                "name": "BitCord", 
-                "emoji": "₿", 
-                "color": 0xF7931A,
-                "icon": "https://cryptologos.cc/logos/bitcoin-btc-logo.png",
-                "description": "La criptomoneda líder del mercado"
-            },
-            "ETH": {
-                "name": "Etherium", 
-                "emoji": "Ξ", 
-                "color": 0x627EEA,
-                "icon": "https://cryptologos.cc/logos/ethereum-eth-logo.png",
-                "description": "Plataforma para contratos inteligentes"
-            },
-            "DOG": {
-                "name": "DoggoCoin", 
-                "emoji": "🐕", 
-                "color": 0xF2A900,
-                "icon": "https://cryptologos.cc/logos/dogecoin-doge-logo.png",
-                "description": "La criptomoneda más divertida"
-            }
-        }
+        prices_data = cog.bot.prices.snapshot()
         
         # Si se especifica una moneda o mostrar_todas es False
         if True:
             crypto_symbol = moneda.upper()
             
-            if crypto_symbol not in configs:
+            if crypto_symbol not in COINS:
                 await interaction.followup.send("❌ Criptomoneda no válida", ephemeral=True)
                 return
             
-            config = configs[crypto_symbol]
+            config = COINS[crypto_symbol]
             crypto_data = prices_data.get(crypto_symbol, {})
             current_price = crypto_data.get('price', 0)
             change_percent = crypto_data.get('change_percent', 0.0)
@@ -180,15 +61,29 @@ def setup_command(crypto_group, cog):
                 inline=False
             )
             
-            # Información de cambio
+            # Información de cambio (últimas 24h)
             embed.add_field(
-                name="📊 CAMBIO PORCENTUAL",
+                name="📊 CAMBIO PORCENTUAL (24H)",
                 value=f"{change_color} **{change_percent:+.2f}%** {change_emoji}\n"
                       f"**Cambio Absoluto:** {change_absolute:+,.0f} monedas\n"
-                      f"**Precio Original:** {original_price:,} monedas",
+                      f"**Precio hace 24h:** {original_price:,} monedas",
                 inline=False
             )
             
+            # Variación, máximo/mínimo y volatilidad por ventana desde las velas en memoria
+            windows = {label: window for label, window in cog.bot.candles.summary(crypto_symbol).items() if window}
+            if windows:
+                embed.add_field(
+                    name="⏱️ VARIACIÓN",
+                    value="\n".join(
+                        f"{'🟢' if w['change_percent'] > 0 else '🔴' if w['change_percent'] < 0 else '⚪'} "
+                        f"**{label}:** {w['change_percent']:+.2f}% · "
+                        f"máx {w['high']:,.0f} · mín {w['low']:,.0f} · volatilidad {w['volatility']:.2f}%"
+                        for label, w in windows.items()
+                    ),
+                    inline=False
+                )
+            
             # Gráfico ASCII simple basado en el cambio
             bar_length = 20
             if abs(change_percent) > 100:
@@ -260,7 +155,7 @@ def setup_command(crypto_group, cog):
             best_performer = None
             worst_performer = None
             
-            for symbol, config in configs.items():
+            for symbol, config in COINS.items():
                 crypto_data = prices_data.get(symbol, {})
                 current_price = crypto_data.get('price', 0)
                 change_percent = crypto_data.get('change_percent', 0.0)
@@ -0,0 +1,40 @@
+import discord
+from datetime import datetime
+
+MEDALS = ["🥇", "🥈", "🥉"]
+
+# ============ COMANDO ============
+def setup_command(crypto_group, cog):
+    @crypto_group.command(name="ranking", description="Ver los usuarios más ricos contando sus criptomonedas")
+    async def ranking(interaction: discord.Interaction):
+        # El patrimonio se revalúa en cada tick de precios: aquí solo se lee de memoria
+        networth = cog.bot.networth
+        top = networth.top(10)
+
+        embed = discord.Embed(
+            title="💎 RANKING DE PATRIMONIO",
+            description="Monedas + valor de las criptomonedas al precio actual (incluye lo reservado en órdenes abiertas)",
+            color=0x9B59B6
+        )
+
+        if not top:
+            embed.add_field(
+                name="📊 Sin datos",
+                value="El ranking se calcula en la próxima actualización de precios",
+                inline=False
+            )
+        else:
+            lines = []
+            for position, entry in enumerate(top, 1):
+                medal = MEDALS[position - 1] if position <= len(MEDALS) else f"**{position}.**"
+                lines.append(
+                    f"{medal} <@{entry['discord_id']}> — **{entry['net_worth']:,.0f}**\n"
+                    f"   └ 💵 {entry['balance']:,} + 🔗 {entry['crypto_value']:,.0f}"
+                )
+            embed.add_field(name="🏆 TOP 10", value="\n".join(lines), inline=False)
+
+        if networth.updated_at:
+            embed.timestamp = datetime.fromtimestamp(networth.updated_at)
+        embed.set_footer(text="Se actualiza cada 5 minutos con los precios")
+
+        await interaction.response.send_message(embed=embed)
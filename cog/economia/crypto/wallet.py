@@ -1,140 +1,9 @@
 import discord
 from discord import app_commands
 from typing import Optional
-import os
 from datetime import datetime, timedelta
-from supabase import create_client
-import json
-
-# ============ FUNCIONES INDEPENDIENTES ============
-def get_supabase_client():
-    SUPABASE_URL = os.getenv('SUPABASE_URL')
-    SUPABASE_KEY = os.getenv('SUPABASE_KEY')
-    
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise ValueError("❌ Faltan variables de entorno SUPABASE_URL o SUPABASE_KEY")
-    
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
-
-def get_current_prices():
-    supabase = get_supabase_client()
-    try:
-        response = supabase.table('crypto_current_prices').select('*').execute()
-        
-        if not response.data:
-            return {"BTC": 10000, "ETH": 3000, "DOG": 50}
-        
-        prices = {}
-        for item in response.data:
-            prices[item['crypto']] = int(item['price'])
-        
-        for crypto in ["BTC", "ETH", "DOG"]:
-            if crypto not in prices:
-                prices[crypto] = {"BTC": 10000, "ETH": 3000, "DOG": 50}[crypto]
-        
-        return prices
-    except Exception as e:
-        print(f"❌ Error al obtener precios: {e}")
-        return {"BTC": 10000, "ETH": 3000, "DOG": 50}
-
-def get_price_history():
-    """Obtiene el historial de precios desde archivo JSON"""
-    try:
-        # Buscar el archivo en el directorio correcto
-        import sys
-        import os
-        
-        # Obtener el directorio actual del archivo
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        history_path = os.path.join(current_dir, "..", "crypto_price_history.json")
-        
-        if os.path.exists(history_path):
-            with open(history_path, 'r') as f:
-                return json.load(f)
-        else:
-            # Buscar en el directorio principal
-            main_dir = os.path.join(current_dir, "..", "..")
-            history_path = os.path.join(main_dir, "crypto_price_history.json")
-            if os.path.exists(history_path):
-                with open(history_path, 'r') as f:
-                    return json.load(f)
-            
-            # Si no existe, crear estructura inicial
-            history = {
-                "BTC": {"original": 10000, "current": 10000, "change_percent": 0.0},
-                "ETH": {"original": 3000, "current": 3000, "change_percent": 0.0},
-                "DOG": {"original": 50, "current": 50, "change_percent": 0.0}
-            }
-            return history
-    except Exception as e:
-        print(f"❌ Error al cargar historial de precios: {e}")
-        return {
-            "BTC": {"original": 10000, "current": 10000, "change_percent": 0.0},
-            "ETH": {"original": 3000, "current": 3000, "change_percent": 0.0},
-            "DOG": {"original": 50, "current": 50, "change_percent": 0.0}
-        }
-
-def get_current_prices_with_change():
-    """Obtiene precios actuales junto con porcentaje de cambio"""
-    current_prices = get_current_prices()
-    history = get_price_history()
-    
-    result = {}
-    for crypto in ["BTC", "ETH", "DOG"]:
-        current_price = current_prices.get(crypto, 0)
-        crypto_history = history.get(crypto, {})
-        
-        result[crypto] = {
-            'price': current_price,
-            'change_percent': crypto_history.get('change_percent', 0.0),
-            'original': crypto_history.get('original', current_price)
-        }
-    
-    return result
-
-def get_or_create_crypto_wallet(discord_id):
-    supabase = get_supabase_client()
-    try:
-        response = supabase.table('crypto_wallets').select('*').eq('discord_id', discord_id).execute()
-        
-        if response.data:
-            return response.data[0]
-        else:
-            wallet_data = {
-                'discord_id': discord_id,
-                'btc_balance': 0.0,
-                'eth_balance': 0.0,
-                'dog_balance': 0.0,
-                'total_invested': 0.0,
-                'total_withdrawn': 0.0
-            }
-            
-            supabase.table('crypto_wallets').insert(wallet_data).execute()
-            
-            response = supabase.table('crypto_wallets').select('*').eq('discord_id', discord_id).execute()
-            return response.data[0]
-            
-    except Exception as e:
-        print(f"❌ Error al obtener/crear wallet: {e}")
-        return None
-
-def get_player_balance(discord_id):
-    supabase = get_supabase_client()
-    try:
-        response = supabase.table('players').select('balance').eq('discord_id', discord_id).execute()
-        
-        if response.data:
-            return response.data[0]['balance']
-        else:
-            supabase.table('players').insert({
-                'discord_id': discord_id,
-                'username': f'Usuario_{discord_id}',
-                'balance': 500
-            }).execute()
-            return 500
-    except Exception as e:
-        print(f"❌ Error al obtener balance: {e}")
-        return 0
+import asyncio
+from core.coins import COINS
 
 # ============ COMANDO MEJORADO ============
 def setup_command(crypto_group, cog):
@@ -146,35 +15,36 @@ def setup_command(crypto_group, cog):
         target_user = usuario if usuario else interaction.user
         is_self = target_user.id == interaction.user.id
         
-        wallet = get_or_create_crypto_wallet(str(target_user.id))
-        if wallet is None:
+        db = cog.bot.db
+        wallet, holdings = await asyncio.gather(
+            db.get_crypto_wallet(str(target_user.id)),
+            db.get_holdings(str(target_user.id))
+        )
+        if wallet is None or holdings is None:
             await interaction.followup.send("❌ Error al cargar la wallet", ephemeral=is_self)
             return
         
-        current_prices_data = get_current_prices_with_change()
-        player_balance = get_player_balance(str(target_user.id))
-        
-        # Configuraciones de criptomonedas
-        cryptos = {
-            "BTC": {"name": "BitCord", "emoji": "₿", "color": 0xF7931A, "icon": "https://cryptologos.cc/logos/bitcoin-btc-logo.png"},
-            "ETH": {"name": "Etherium", "emoji": "Ξ", "color": 0x627EEA, "icon": "https://cryptologos.cc/logos/ethereum-eth-logo.png"},
-            "DOG": {"name": "DoggoCoin", "emoji": "🐕", "color": 0xF2A900, "icon": "https://cryptologos.cc/logos/dogecoin-doge-logo.png"}
-        }
+        current_prices_data = cog.bot.prices.snapshot()
+        player = await db.get_player(str(target_user.id), target_user.name)
+        player_balance = player['balance'] if player else 0
         
-        # Calcular valores
-        total_crypto_value = 0
+        # Calcular valores: fila de tenencias · vector de precios
+        book = cog.bot.holdings
+        amounts = book.vector(target_user.id)
+        price_vector = cog.bot.market.to_vector(cog.bot.prices.prices())
+        total_crypto_value = float(amounts @ price_vector)
         crypto_details = []
         market_changes = []
         
-        for symbol, config in cryptos.items():
-            balance = wallet.get(f'{symbol.lower()}_balance', 0.0)
+        for symbol, config in COINS.items():
+            column = book.coin_index[symbol]
+            balance = float(amounts[column])
             price_data = current_prices_data.get(symbol, {})
             price = price_data.get('price', 0)
             change_percent = price_data.get('change_percent', 0.0)
             original_price = price_data.get('original', price)
             
-            value = balance * price
-            total_crypto_value += value
+            value = balance * price_vector[column]
             
             if balance > 0:
                 crypto_details.append({
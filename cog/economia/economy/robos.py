@@ -2,24 +2,11 @@ import discord
 from discord import app_commands
 import time
 import random
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
-
-# Cargar variables de entorno
-load_dotenv()
-
-# Inicializar cliente de Supabase
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
 
 # Configuración
-INITIAL_BALANCE = 500
 ROB_SUCCESS_RATE = 0.40
 ROB_COOLDOWN = 1800
 ROB_PENALTY_PERCENT = 0.25
-CHANNEL_LEADERBOARD_ID = int(os.getenv("CHANNEL_LEADERBOARD_ID"))
 
 ROB_PERCENTAGES = {
     1: 0.70,
@@ -31,90 +18,6 @@ ROB_PERCENTAGES = {
     7: 0.10
 }
 
-# Funciones de base de datos locales
-async def get_player(discord_id, username):
-    """Obtiene o crea un jugador en Supabase"""
-    try:
-        response = supabase.table("players").select("*").eq("discord_id", discord_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        else:
-            new_player = {
-                "discord_id": discord_id,
-                "username": username,
-                "balance": INITIAL_BALANCE,
-                "created_at": time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            response = supabase.table("players").insert(new_player).execute()
-            return response.data[0] if response.data else None
-    except Exception as e:
-        print(f"Error en get_player: {e}")
-        return None
-
-async def update_balance(discord_id, amount):
-    """Actualiza el balance de un jugador en Supabase"""
-    try:
-        response = supabase.table("players").select("balance").eq("discord_id", discord_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            current_balance = response.data[0]["balance"]
-            new_balance = current_balance + amount
-            
-            supabase.table("players").update({"balance": new_balance}).eq("discord_id", discord_id).execute()
-            return new_balance
-        return None
-    except Exception as e:
-        print(f"Error en update_balance: {e}")
-        return None
-
-async def update_player(discord_id, data):
-    """Actualiza múltiples campos de un jugador en Supabase"""
-    try:
-        supabase.table("players").update(data).eq("discord_id", discord_id).execute()
-        return True
-    except Exception as e:
-        print(f"Error en update_player: {e}")
-        return False
-
-async def get_leaderboard(limit=10):
-    """Obtiene el leaderboard desde Supabase"""
-    try:
-        response = supabase.table("players").select("username, balance").order("balance", desc=True).limit(limit).execute()
-        return response.data if response.data else []
-    except Exception as e:
-        print(f"Error en get_leaderboard: {e}")
-        return []
-
-async def update_global_leaderboard(bot):
-    """Actualiza el leaderboard global en el canal especificado"""
-    channel = bot.get_channel(CHANNEL_LEADERBOARD_ID)
-    if not channel:
-        print("❌ Canal de leaderboard no encontrado")
-        return
-    
-    try:
-        leaderboard = await get_leaderboard(10)
-        await channel.purge()
-        
-        embed = discord.Embed(title="🏆 TABLA DE LÍDERES GLOBAL", color=discord.Color.gold())
-        
-        for i, player in enumerate(leaderboard[:10], start=1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            embed.add_field(
-                name=f"{medal} {player['username']}", 
-                value=f"```{player['balance']:,} monedas```", 
-                inline=False
-            )
-        
-        embed.set_footer(text="Actualizado automáticamente")
-        await channel.send(embed=embed)
-        print("✅ Leaderboard global actualizado")
-        
-    except Exception as e:
-        print(f"❌ Error actualizando leaderboard: {e}")
-
-# Funciones específicas de robos
 def get_digit_count(amount):
     return len(str(abs(amount)))
 
@@ -124,62 +27,85 @@ def get_rob_percentage(amount):
         return ROB_PERCENTAGES[7]
     return ROB_PERCENTAGES.get(digits, 0.10)
 
-async def get_rob_cooldown(discord_id):
-    """Obtiene el tiempo del último robo desde Supabase"""
-    try:
-        player = await get_player(discord_id, "")
-        return player.get("last_rob", 0) if player else 0
-    except Exception as e:
-        print(f"Error en get_rob_cooldown: {e}")
-        return 0
+def get_cooldown_embed(last_rob, current_time):
+    """Embed de enfriamiento con el tiempo restante hasta el próximo robo"""
+    remaining_time = ROB_COOLDOWN - (current_time - last_rob)
+    minutes = remaining_time // 60
+    seconds = remaining_time % 60
+    
+    return discord.Embed(
+        title="⏰ Enfriamiento Activo",
+        description=f"Debes esperar {minutes}m {seconds}s antes de intentar otro robo.",
+        color=discord.Color.orange()
+    )
 
-async def attempt_robbery(robber_id, victim_id, robber_username, victim_username):
-    """Intenta realizar un robo usando Supabase"""
+async def attempt_robbery(db, robber_data, victim_data, current_time):
+    """Intenta realizar un robo usando Supabase.
+    
+    El movimiento de dinero y el registro del enfriamiento se hacen en una
+    única transacción (`db.transfer`). Devuelve también el nuevo balance del
+    ladrón; si otro robo se adelantó, devuelve "cooldown" y actualiza
+    `robber_data["last_rob"]`.
+    """
     try:
-        robber_data = await get_player(robber_id, robber_username)
-        victim_data = await get_player(victim_id, victim_username)
-        
         if not robber_data or not victim_data:
-            return "error", 0, 0, 0, 0
+            return "error", 0, 0, 0, 0, 0
         
+        robber_id = robber_data["discord_id"]
+        victim_id = victim_data["discord_id"]
         robber_balance = robber_data["balance"]
         victim_balance = victim_data["balance"]
         
-        if robber_balance < 0:
-            return "insufficient_funds", 0, 0, 0, 0
-        
-        if victim_balance < 1:
-            return "victim_poor", 0, 0, 0, 0
+        if robber_balance < 0 or victim_balance < 1:
+            # El intento consume el enfriamiento igualmente
+            await db.update_player(robber_id, {"last_rob": current_time})
+            status = "insufficient_funds" if robber_balance < 0 else "victim_poor"
+            return status, 0, 0, 0, 0, robber_balance
         
         rob_percentage = get_rob_percentage(victim_balance)
         attempted_rob_amount = int(victim_balance * rob_percentage)
         attempted_rob_amount = max(1, attempted_rob_amount)
-        actual_rob_amount = min(attempted_rob_amount, victim_balance)
         
         success = random.random() <= ROB_SUCCESS_RATE
         
         if success:
-            await update_balance(victim_id, -actual_rob_amount)
-            await update_balance(robber_id, actual_rob_amount)
-            return "success", actual_rob_amount, rob_percentage, 0, attempted_rob_amount
+            # La víctima paga lo que pueda (clamp) si su saldo cambió desde la lectura
+            transfer = await db.transfer(
+                victim_id, robber_id, attempted_rob_amount, clamp=True,
+                rob_by=robber_id, rob_time=current_time, rob_cooldown=ROB_COOLDOWN
+            )
         else:
             penalty_amount = int(attempted_rob_amount * ROB_PENALTY_PERCENT)
             penalty_amount = max(1, penalty_amount)
             max_penalty = max(1, int(robber_balance * 0.5))
             penalty_amount = min(penalty_amount, max_penalty)
             
-            await update_balance(robber_id, -penalty_amount)
-            await update_balance(victim_id, penalty_amount)
-            return "failed", 0, rob_percentage, penalty_amount, attempted_rob_amount
+            # La multa se cobra aunque deje al ladrón en negativo
+            transfer = await db.transfer(
+                robber_id, victim_id, penalty_amount, require_funds=False,
+                rob_by=robber_id, rob_time=current_time, rob_cooldown=ROB_COOLDOWN
+            )
+        
+        if not transfer or transfer["status"] == "not_found":
+            return "error", 0, 0, 0, 0, robber_balance
+        
+        if transfer["status"] == "cooldown":
+            robber_data["last_rob"] = transfer["last_rob"]
+            return "cooldown", 0, 0, 0, 0, robber_balance
+        
+        if success:
+            return "success", transfer["amount"], rob_percentage, 0, attempted_rob_amount, transfer["to_balance"]
+        return "failed", 0, rob_percentage, transfer["amount"], attempted_rob_amount, transfer["from_balance"]
             
     except Exception as e:
         print(f"Error en attempt_robbery: {e}")
-        return "error", 0, 0, 0, 0
+        return "error", 0, 0, 0, 0, 0
 
 def setup_command(economy_group, cog):
     @economy_group.command(name="robar", description="Intenta robar monedas a otro usuario (riesgo moderado)")
     @app_commands.describe(usuario="El usuario al que quieres robar")
     async def robar(interaction: discord.Interaction, usuario: discord.User):
+        db = cog.bot.db
         robber_id = str(interaction.user.id)
         robber_username = interaction.user.name
         victim_id = str(usuario.id)
@@ -194,35 +120,29 @@ def setup_command(economy_group, cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Verificar cooldown
-        last_rob = await get_rob_cooldown(robber_id)
         current_time = int(time.time())
-        time_since_last_rob = current_time - last_rob
         
-        if time_since_last_rob < ROB_COOLDOWN:
-            remaining_time = ROB_COOLDOWN - time_since_last_rob
-            minutes = remaining_time // 60
-            seconds = remaining_time % 60
-            
-            embed = discord.Embed(
-                title="⏰ Enfriamiento Activo",
-                description=f"Debes esperar {minutes}m {seconds}s antes de intentar otro robo.",
-                color=discord.Color.orange()
-            )
+        # Leer ladrón y víctima en una sola consulta
+        players = await db.get_players({robber_id: robber_username, victim_id: victim_username})
+        robber_data = players.get(robber_id)
+        victim_data = players.get(victim_id)
+        
+        # Verificar cooldown
+        last_rob = (robber_data or {}).get("last_rob") or 0
+        if current_time - last_rob < ROB_COOLDOWN:
+            embed = get_cooldown_embed(last_rob, current_time)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Actualizar cooldown inmediatamente
-        await update_player(robber_id, {"last_rob": current_time})
-        
-        # Intentar el robo
-        result, amount, percentage, penalty, attempted_amount = await attempt_robbery(
-            robber_id, victim_id, robber_username, victim_username
+        # Intentar el robo (la transacción vuelve a comprobar y registra el enfriamiento)
+        result, amount, percentage, penalty, attempted_amount, robber_new_balance = await attempt_robbery(
+            db, robber_data, victim_data, current_time
         )
         
-        # Obtener nuevo balance del ladrón
-        robber_new_data = await get_player(robber_id, robber_username)
-        robber_new_balance = robber_new_data["balance"] if robber_new_data else 0
+        if result == "cooldown":
+            embed = get_cooldown_embed(robber_data["last_rob"], current_time)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
         
         if result == "insufficient_funds":
             embed = discord.Embed(
@@ -274,11 +194,7 @@ def setup_command(economy_group, cog):
             await interaction.response.send_message(embed=embed)
             
             # Actualizar leaderboard global
-            try:
-                await update_global_leaderboard(interaction.client)
-                print(f"✅ Leaderboard actualizado después de robo exitoso de {robber_username}")
-            except Exception as e:
-                print(f"❌ Error actualizando leaderboard después de robo exitoso: {e}")
+            interaction.client.leaderboard.mark_dirty()
         
         elif result == "failed":
             fail_messages = [
@@ -317,11 +233,7 @@ def setup_command(economy_group, cog):
             await interaction.response.send_message(embed=embed)
             
             # Actualizar leaderboard global
-            try:
-                await update_global_leaderboard(interaction.client)
-                print(f"✅ Leaderboard actualizado después de robo fallido de {robber_username}")
-            except Exception as e:
-                print(f"❌ Error actualizando leaderboard después de robo fallido: {e}")
+            interaction.client.leaderboard.mark_dirty()
 
     @economy_group.command(name="estadisticas_robo", description="Muestra las estadísticas y expectativas del sistema de robos")
     async def estadisticas_robo(interaction: discord.Interaction):
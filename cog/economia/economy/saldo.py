@@ -1,43 +1,7 @@
 import discord
 from discord import app_commands
-import time
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
 from typing import Optional
 
-# Cargar variables de entorno
-load_dotenv()
-
-# Inicializar cliente de Supabase
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
-
-# Configuración
-INITIAL_BALANCE = 500
-
-# Funciones de base de datos locales
-async def get_player(discord_id, username):
-    """Obtiene o crea un jugador en Supabase"""
-    try:
-        response = supabase.table("players").select("*").eq("discord_id", discord_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        else:
-            new_player = {
-                "discord_id": discord_id,
-                "username": username,
-                "balance": INITIAL_BALANCE,
-                "created_at": time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            response = supabase.table("players").insert(new_player).execute()
-            return response.data[0] if response.data else None
-    except Exception as e:
-        print(f"Error en get_player: {e}")
-        return None
-
 def setup_command(economy_group, cog):
     @economy_group.command(name="saldo", description="Muestra tu saldo o el de otro usuario")
     @app_commands.describe(usuario="Usuario cuyo saldo quieres ver (opcional)")
@@ -46,7 +10,7 @@ def setup_command(economy_group, cog):
         is_self = target_user.id == interaction.user.id
         
         try:
-            player = await get_player(str(target_user.id), target_user.name)
+            player = await cog.bot.db.get_player(str(target_user.id), target_user.name)
             
             if not player:
                 embed = discord.Embed(
@@ -73,37 +37,25 @@ def setup_command(economy_group, cog):
             
             embed.add_field(name="💵 Saldo", value=f"**{player['balance']:,}** monedas", inline=True)
             
-            # Obtener ranking desde Supabase
-            response = supabase.table("players").select("balance").order("balance", desc=True).execute()
-            all_players = response.data if response.data else []
+            # Ranking desde el índice en memoria (sin recorrer la tabla players)
+            ranking = cog.bot.ranking
+            rank = ranking.rank(player["discord_id"]) or 1
+            total_players = max(len(ranking), 1)
+            embed.add_field(
+                name="🏆 Ranking", 
+                value=f"**#{rank}** de {total_players} jugadores", 
+                inline=True
+            )
             
-            if all_players:
-                # Encontrar posición del jugador
-                sorted_balances = sorted([p["balance"] for p in all_players], reverse=True)
-                try:
-                    rank = sorted_balances.index(player["balance"]) + 1
-                except ValueError:
-                    rank = len(sorted_balances) + 1
-                
-                total_players = len(all_players)
-                embed.add_field(
-                    name="🏆 Ranking", 
-                    value=f"**#{rank}** de {total_players} jugadores", 
-                    inline=True
-                )
-                
-                # Calcular porcentaje del total de riqueza
-                total_wealth = sum(p["balance"] for p in all_players) or 1
-                wealth_percentage = (player["balance"] / total_wealth) * 100
-                
-                embed.add_field(
-                    name="📊 Riqueza Global", 
-                    value=f"**{wealth_percentage:.2f}%** del total", 
-                    inline=True
-                )
-            else:
-                embed.add_field(name="🏆 Ranking", value="**#1** de 1 jugador", inline=True)
-                embed.add_field(name="📊 Riqueza Global", value="**100.00%** del total", inline=True)
+            # Calcular porcentaje del total de riqueza
+            total_wealth = ranking.total_wealth or 1
+            wealth_percentage = (player["balance"] / total_wealth) * 100
+            
+            embed.add_field(
+                name="📊 Riqueza Global", 
+                value=f"**{wealth_percentage:.2f}%** del total", 
+                inline=True
+            )
             
             embed.set_thumbnail(url=target_user.display_avatar.url)
             
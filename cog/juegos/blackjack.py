@@ -1,101 +1,18 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import time
 import random
 import asyncio
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Inicializar cliente de Supabase
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
-
 # Configuración
-INITIAL_BALANCE = 500
-CHANNEL_LEADERBOARD_ID = int(os.getenv("CHANNEL_LEADERBOARD_ID"))
 CHANNEL_TROPHY_ID = int(os.getenv("CHANNEL_TROPHY_ID"))
 CHANNEL_BET_ID = int(os.getenv("CHANNEL_BET_ID"))
 
-# Funciones de base de datos locales
-async def get_player(discord_id, username):
-    """Obtiene o crea un jugador en Supabase"""
-    try:
-        response = supabase.table("players").select("*").eq("discord_id", discord_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        else:
-            new_player = {
-                "discord_id": discord_id,
-                "username": username,
-                "balance": INITIAL_BALANCE,
-                "created_at": time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            response = supabase.table("players").insert(new_player).execute()
-            return response.data[0] if response.data else None
-    except Exception as e:
-        print(f"Error en get_player: {e}")
-        return None
-
-async def update_balance(discord_id, amount):
-    """Actualiza el balance de un jugador en Supabase"""
-    try:
-        response = supabase.table("players").select("balance").eq("discord_id", discord_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            current_balance = response.data[0]["balance"]
-            new_balance = current_balance + amount
-            
-            supabase.table("players").update({"balance": new_balance}).eq("discord_id", discord_id).execute()
-            return new_balance
-        return None
-    except Exception as e:
-        print(f"Error en update_balance: {e}")
-        return None
-
-async def get_leaderboard(limit=10):
-    """Obtiene el leaderboard desde Supabase"""
-    try:
-        response = supabase.table("players").select("username, balance").order("balance", desc=True).limit(limit).execute()
-        return response.data if response.data else []
-    except Exception as e:
-        print(f"Error en get_leaderboard: {e}")
-        return []
-
-async def update_global_leaderboard(bot):
-    """Actualiza el leaderboard global en el canal especificado"""
-    channel = bot.get_channel(CHANNEL_LEADERBOARD_ID)
-    if not channel:
-        print("❌ Canal de leaderboard no encontrado")
-        return
-    
-    try:
-        leaderboard = await get_leaderboard(10)
-        await channel.purge()
-        
-        embed = discord.Embed(title="🏆 TABLA DE LÍDERES GLOBAL", color=discord.Color.gold())
-        
-        for i, player in enumerate(leaderboard[:10], start=1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            embed.add_field(
-                name=f"{medal} {player['username']}", 
-                value=f"```{player['balance']:,} monedas```", 
-                inline=False
-            )
-        
-        embed.set_footer(text="Actualizado automáticamente")
-        await channel.send(embed=embed)
-        print("✅ Leaderboard global actualizado")
-        
-    except Exception as e:
-        print(f"❌ Error actualizando leaderboard: {e}")
-
 async def update_global_trophy_wall(bot, winner=None, game_type="Blackjack"):
     """Actualiza el muro de trofeos"""
     channel = bot.get_channel(CHANNEL_TROPHY_ID)
@@ -299,7 +216,7 @@ class BlackjackCog(commands.Cog):
     
         # Turnos de los jugadores
         for player, bet_amount in players_data.items():
-            player_data = await get_player(str(player.id), player.name)
+            player_data = await self.bot.db.get_player(str(player.id), player.name)
             
             if player_data["balance"] < bet_amount:
                 embed = discord.Embed(
@@ -388,7 +305,7 @@ class BlackjackCog(commands.Cog):
     
         # Restar todas las apuestas primero
         for player, bet_amount in players_data.items():
-            await update_balance(str(player.id), -bet_amount)
+            await self.bot.db.update_balance(str(player.id), -bet_amount)
     
         # Calcular el bote total
         total_bote = sum(players_data.values())
@@ -421,7 +338,7 @@ class BlackjackCog(commands.Cog):
                 premio_total = apuesta_ganador + prize_per_winner + (extra_prize if i == 0 else 0)
             
                 # Actualizar balance
-                await update_balance(str(winner.id), premio_total)
+                await self.bot.db.update_balance(str(winner.id), premio_total)
             
                 results.append({
                     "player": winner,
@@ -525,7 +442,7 @@ class BlackjackCog(commands.Cog):
                 apuesta = result["apuesta"]
                 ganancia_neta = premio_total - apuesta
                 
-                player_data = await get_player(str(winner.id), winner.name)
+                player_data = await self.bot.db.get_player(str(winner.id), winner.name)
                 
                 embed.add_field(
                     name=f"🏅 {winner.display_name}",
@@ -551,11 +468,11 @@ class BlackjackCog(commands.Cog):
         await channel.send(embed=embed)
         
         # Actualizar leaderboard y muro de trofeos
+        self.bot.leaderboard.mark_dirty()
         try:
-            await update_global_leaderboard(self.bot)
             await update_global_trophy_wall(self.bot, winners)
         except Exception as e:
-            print(f"❌ Error actualizando leaderboard/trophy después de blackjack: {e}")
+            print(f"❌ Error actualizando muro de trofeos después de blackjack: {e}")
 
     @blackjack.command(name="unirse", description="Únete a la partida de Blackjack actual.")
     @app_commands.describe(apuesta="Cantidad a apostar")
@@ -572,7 +489,7 @@ class BlackjackCog(commands.Cog):
             await interaction.response.send_message(f"❌ La apuesta mínima es de {self.current_bet_min:,} monedas.", ephemeral=True)
             return
     
-        player_data = await get_player(str(interaction.user.id), interaction.user.name)
+        player_data = await self.bot.db.get_player(str(interaction.user.id), interaction.user.name)
         if player_data["balance"] < apuesta:
             await interaction.response.send_message(f"❌ No tienes suficiente dinero. Tu saldo: {player_data['balance']:,} monedas.", ephemeral=True)
             return
@@ -6,20 +6,12 @@ import random
 import asyncio
 import os
 import json
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Inicializar cliente de Supabase
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
-
 # Configuración
-INITIAL_BALANCE = 500
-CHANNEL_LEADERBOARD_ID = int(os.getenv("CHANNEL_LEADERBOARD_ID"))
 TEMP_CHANNEL_PREFIX = "wordless-"
 REWARD_1ST = 1000
 REWARD_2ND = 500
@@ -56,81 +48,6 @@ def load_word_lists():
 # Cargar las listas de palabras al inicio
 TARGET_WORDS, ALLOWED_WORDS = load_word_lists()
 
-# Funciones de base de datos locales
-async def get_player(discord_id, username):
-    """Obtiene o crea un jugador en Supabase"""
-    try:
-        response = supabase.table("players").select("*").eq("discord_id", discord_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        else:
-            new_player = {
-                "discord_id": discord_id,
-                "username": username,
-                "balance": INITIAL_BALANCE,
-                "created_at": time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            response = supabase.table("players").insert(new_player).execute()
-            return response.data[0] if response.data else None
-    except Exception as e:
-        print(f"Error en get_player: {e}")
-        return None
-
-async def update_balance(discord_id, amount):
-    """Actualiza el balance de un jugador en Supabase"""
-    try:
-        response = supabase.table("players").select("balance").eq("discord_id", discord_id).execute()
-        
-        if response.data and len(response.data) > 0:
-            current_balance = response.data[0]["balance"]
-            new_balance = current_balance + amount
-            
-            supabase.table("players").update({"balance": new_balance}).eq("discord_id", discord_id).execute()
-            return new_balance
-        return None
-    except Exception as e:
-        print(f"Error en update_balance: {e}")
-        return None
-
-async def get_leaderboard(limit=10):
-    """Obtiene el leaderboard desde Supabase"""
-    try:
-        response = supabase.table("players").select("username, balance").order("balance", desc=True).limit(limit).execute()
-        return response.data if response.data else []
-    except Exception as e:
-        print(f"Error en get_leaderboard: {e}")
-        return []
-
-async def update_global_leaderboard(bot):
-    """Actualiza el leaderboard global en el canal especificado"""
-    channel = bot.get_channel(CHANNEL_LEADERBOARD_ID)
-    if not channel:
-        print("❌ Canal de leaderboard no encontrado")
-        return
-    
-    try:
-        leaderboard = await get_leaderboard(10)
-        await channel.purge()
-        
-        embed = discord.Embed(title="🏆 TABLA DE LÍDERES GLOBAL", color=discord.Color.gold())
-        
-        for i, player in enumerate(leaderboard[:10], start=1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            embed.add_field(
-                name=f"{medal} {player['username']}", 
-                value=f"```{player['balance']:,} monedas```", 
-                inline=False
-            )
-        
-        embed.set_footer(text="Actualizado automáticamente")
-        await channel.send(embed=embed)
-        print("✅ Leaderboard global actualizado")
-        
-    except Exception as e:
-        print(f"❌ Error actualizando leaderboard: {e}")
-
-# Funciones del juego Wordless
 def choose_word():
     """Elige una palabra objetivo aleatoria de la lista"""
     if not TARGET_WORDS:
@@ -191,7 +108,7 @@ class ForfeitButton(discord.ui.View):
         game = self.cog.games.get(self.user_id)
         if game:
             # Obtener información del jugador
-            player_data = await get_player(str(game.user_id), interaction.user.name)
+            player_data = await self.cog.bot.db.get_player(str(game.user_id), interaction.user.name)
             
             embed = discord.Embed(
                 title="🏳️ Te has rendido",
@@ -394,8 +311,7 @@ class WordlessCog(commands.Cog):
                 reward = REWARD_BASE
             
             # Dar recompensa
-            new_balance = await update_balance(str(game.user_id), reward)
-            player_data = await get_player(str(game.user_id), interaction.user.name)
+            new_balance = await self.bot.db.update_balance(str(game.user_id), reward)
             
             # Embed de victoria
             win_embed = discord.Embed(
@@ -411,11 +327,7 @@ class WordlessCog(commands.Cog):
             await interaction.channel.send(embed=win_embed)
             
             # Actualizar leaderboard
-            try:
-                await update_global_leaderboard(self.bot)
-                print(f"✅ Leaderboard actualizado después de victoria en Wordless de {interaction.user.name}")
-            except Exception as e:
-                print(f"❌ Error actualizando leaderboard después de Wordless: {e}")
+            self.bot.leaderboard.mark_dirty()
             
             # Terminar el juego
             await asyncio.sleep(3)
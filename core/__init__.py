@@ -0,0 +1,5 @@
+"""Servicios compartidos del bot (base de datos, cachés, tareas en segundo plano).
+
+Los Cogs no importan `main-bot.py`; acceden a estos servicios a través de
+los atributos que se cuelgan del objeto `bot` durante el arranque.
+"""
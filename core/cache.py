@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Caché LRU con caducidad por entrada.
+
+    Guarda como máximo `maxsize` entradas; al superarlo expulsa la menos
+    usada recientemente. Una entrada con más de `ttl` segundos se considera
+    caducada y cuenta como fallo. Lleva contadores de aciertos, fallos y
+    expulsiones para poder dimensionarla.
+    """
+
+    def __init__(self, maxsize=5000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Devuelve el valor o None si no está o ha caducado"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def update(self, key, fields):
+        """Aplica `fields` sobre una entrada existente (escritura directa).
+
+        No renueva la caducidad: los datos que no hemos escrito nosotros
+        siguen envejeciendo.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            entry[0].update(fields)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
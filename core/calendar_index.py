@@ -0,0 +1,127 @@
+from heapq import merge
+
+from sortedcontainers import SortedKeyList
+
+from core.recurrence import Series
+
+
+def _start(event):
+    return event.timestamp
+
+
+class EventIndex:
+    """Índice temporal de los eventos del calendario.
+
+    Los eventos se guardan ordenados por inicio (marca Unix), en conjunto y
+    por calendario, así que cualquier consulta por rango es O(log n + k) y
+    los conteos de las estadísticas son O(log n) sin recorrer la lista. Se
+    actualiza evento a evento (`add`/`remove`) con lo que cambia en cada
+    sincronización; `version` aumenta con cada cambio.
+
+    Los eventos recurrentes se guardan como series (`core/recurrence.py`) y
+    solo se expanden las ocurrencias del rango consultado. Un evento con
+    `recurrence_id` sustituye a esa ocurrencia de la serie de su mismo UID.
+    """
+
+    def __init__(self, events=()):
+        self._all = SortedKeyList(key=_start)
+        self._calendars = {}
+        self._series = {}
+        self._overrides = {}
+        self._events = None
+        self.version = 0
+        for event in events:
+            self.add(event)
+
+    def __len__(self):
+        return len(self._all) + sum(len(partition) for partition in self._series.values())
+
+    @property
+    def events(self):
+        """Eventos sueltos y series (por su primera ocurrencia), ordenados por inicio"""
+        if self._events is None:
+            templates = sorted(
+                (series.template for partition in self._series.values() for series in partition),
+                key=_start
+            )
+            self._events = list(merge(self._all, templates, key=_start))
+        return self._events
+
+    def _partition(self, calendar=None):
+        if calendar is None:
+            return self._all
+        partition = self._calendars.get(calendar)
+        if partition is None:
+            partition = self._calendars[calendar] = SortedKeyList(key=_start)
+        return partition
+
+    def _changed(self):
+        self._events = None
+        self.version += 1
+
+    def add(self, event):
+        if isinstance(event, Series):
+            self._series.setdefault(event.calendar, []).append(event)
+        else:
+            self._all.add(event)
+            self._partition(event.calendar).add(event)
+            if event.recurrence_id is not None:
+                self._overrides.setdefault((event.calendar, event.uid), set()).add(event.recurrence_id)
+        self._changed()
+
+    def remove(self, event):
+        if isinstance(event, Series):
+            partition = self._series.get(event.calendar, [])
+            if event in partition:
+                partition.remove(event)
+        else:
+            self._all.discard(event)
+            self._partition(event.calendar).discard(event)
+            if event.recurrence_id is not None:
+                self._overrides.get((event.calendar, event.uid), set()).discard(event.recurrence_id)
+        self._changed()
+
+    def _bounds(self, partition, lo=None, hi=None, include_lo=True):
+        first = 0
+        if lo is not None:
+            lo = lo.timestamp()
+            first = partition.bisect_key_left(lo) if include_lo else partition.bisect_key_right(lo)
+        last = len(partition) if hi is None else partition.bisect_key_right(hi.timestamp())
+        return first, max(first, last)
+
+    def overrides(self, series):
+        """Inicios (marcas Unix) de las ocurrencias de una serie sustituidas por otro evento"""
+        return self._overrides.get((series.calendar, series.uid), ())
+
+    def _occurrences(self, lo=None, hi=None, calendar=None, include_lo=True):
+        """Un generador ordenado por cada serie con las ocurrencias del rango"""
+        if calendar is None:
+            series = [series for partition in self._series.values() for series in partition]
+        else:
+            series = self._series.get(calendar, [])
+        lo = lo.timestamp() if lo is not None else None
+        hi = hi.timestamp() if hi is not None else None
+        return [
+            s.occurrences(lo, hi, include_lo, self.overrides(s))
+            for s in series
+        ]
+
+    def between(self, lo=None, hi=None, calendar=None, include_lo=True):
+        """Eventos con lo <= inicio <= hi (lo < inicio si `include_lo` es False)"""
+        partition = self._partition(calendar)
+        first, last = self._bounds(partition, lo, hi, include_lo)
+        single = partition.islice(first, last)
+        occurrences = self._occurrences(lo, hi, calendar, include_lo)
+        if not occurrences:
+            return list(single)
+        return list(merge(single, *occurrences, key=_start))
+
+    def count(self, lo=None, hi=None, calendar=None, include_lo=True):
+        """Como `between`, pero solo el número de eventos"""
+        first, last = self._bounds(self._partition(calendar), lo, hi, include_lo)
+        return last - first + sum(
+            sum(1 for _ in occurrences) for occurrences in self._occurrences(lo, hi, calendar, include_lo)
+        )
+
+    def calendar_size(self, calendar):
+        return len(self._partition(calendar)) + len(self._series.get(calendar, []))
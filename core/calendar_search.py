@@ -0,0 +1,102 @@
+import re
+import unicodedata
+
+from sortedcontainers import SortedList
+
+TOKEN = re.compile(r"\w+")
+
+# Peso de cada aparición de un término según el campo
+SUMMARY_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+
+def fold(text):
+    """Minúsculas y sin tildes: 'Matemáticas' → 'matematicas'"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return TOKEN.findall(fold(text))
+
+
+class SearchIndex:
+    """Índice invertido de los eventos del calendario para `/calendario buscar`.
+
+    Cada término (sin tildes ni mayúsculas) apunta a los eventos que lo
+    contienen con un peso mayor si aparece en el título. El vocabulario se
+    guarda ordenado, de modo que un término de la búsqueda se trata como
+    prefijo con un rango del vocabulario. Una búsqueda intersecta las listas
+    de los términos: su coste depende de los resultados, no del texto total.
+    Cada evento se indexa con una clave propia para poder quitarlo o
+    sustituirlo cuando cambia en el feed.
+    """
+
+    def __init__(self, items=()):
+        self._postings = {}
+        self._terms = SortedList()
+        self._docs = {}
+        self._doc_terms = {}
+        for doc_id, event in items:
+            self.add(doc_id, event)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, event):
+        """Indexa un evento con la clave `doc_id` (sustituye al anterior con esa clave)"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+
+        weights = {}
+        for token in tokenize(event.summary):
+            weights[token] = weights.get(token, 0) + SUMMARY_WEIGHT
+        for token in tokenize(event.description):
+            weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+
+        self._docs[doc_id] = event
+        self._doc_terms[doc_id] = weights
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms.add(term)
+            postings[doc_id] = weight
+
+    def remove(self, doc_id):
+        """Quita un evento del índice"""
+        self._docs.pop(doc_id, None)
+        for term in self._doc_terms.pop(doc_id, {}):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._terms.remove(term)
+
+    def _expand(self, token):
+        """Términos del vocabulario que empiezan por `token`"""
+        return self._terms.irange(token, token + "\uffff", inclusive=(True, False))
+
+    def search(self, query, limit=None):
+        """Eventos que contienen todos los términos de `query` (como prefijo), por relevancia"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        scores = None
+        for token in tokens:
+            matches = {}
+            for term in self._expand(token):
+                # Coincidencia exacta puntúa el doble que un prefijo
+                bonus = 2 if term == token else 1
+                for doc_id, weight in self._postings[term].items():
+                    if scores is None or doc_id in scores:
+                        matches[doc_id] = max(matches.get(doc_id, 0), weight * bonus)
+            if scores is not None:
+                matches = {doc_id: scores[doc_id] + score for doc_id, score in matches.items()}
+            scores = matches
+            if not scores:
+                return []
+
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], self._docs[doc_id].start))
+        return [self._docs[doc_id] for doc_id in ranked[:limit]]
@@ -0,0 +1,142 @@
+import math
+import time
+
+from core.timeseries import HOUR, DAY, WEEK
+
+# Ventana → (ancho de vela en segundos, número de velas)
+WINDOWS = {
+    "1h": (5 * 60, 12),
+    "24h": (HOUR, 24),
+    "7d": (DAY, 7),
+}
+
+
+class CandleRing:
+    """Últimas `size` velas OHLC de `width` segundos de una moneda (búfer circular).
+
+    Además de apertura/máximo/mínimo/cierre, cada vela acumula el número de
+    rendimientos logarítmicos de sus ticks, su suma y su suma de cuadrados:
+    con eso la volatilidad de la ventana sale sin recorrer los ticks.
+    """
+
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.head = -1
+        self.starts = [None] * size
+        self.open = [0.0] * size
+        self.high = [0.0] * size
+        self.low = [0.0] * size
+        self.close = [0.0] * size
+        self.count = [0] * size
+        self.sum_r = [0.0] * size
+        self.sum_r2 = [0.0] * size
+
+    def add(self, timestamp, price, log_return=None):
+        start = timestamp - timestamp % self.width
+        h = self.head
+        if h < 0 or start > self.starts[h]:
+            # Vela nueva: ocupa el hueco de la más antigua
+            h = self.head = (h + 1) % self.size
+            self.starts[h] = start
+            self.open[h] = self.high[h] = self.low[h] = self.close[h] = price
+            self.count[h] = 0
+            self.sum_r[h] = self.sum_r2[h] = 0.0
+        else:
+            self.high[h] = max(self.high[h], price)
+            self.low[h] = min(self.low[h], price)
+            self.close[h] = price
+        if log_return is not None:
+            self.count[h] += 1
+            self.sum_r[h] += log_return
+            self.sum_r2[h] += log_return * log_return
+
+    def window(self, now):
+        """Agregado de las velas de la ventana que termina en `now`, o None si no hay datos"""
+        if self.head < 0:
+            return None
+        since = now - self.width * self.size
+        first = None
+        high, low = -math.inf, math.inf
+        n, sum_r, sum_r2 = 0, 0.0, 0.0
+        # Como mucho `size` velas: coste constante por consulta
+        for step in range(self.size):
+            i = (self.head - step) % self.size
+            start = self.starts[i]
+            if start is None or start < since:
+                break
+            first = i
+            high = max(high, self.high[i])
+            low = min(low, self.low[i])
+            n += self.count[i]
+            sum_r += self.sum_r[i]
+            sum_r2 += self.sum_r2[i]
+        if first is None:
+            return None
+
+        open_ = self.open[first]
+        close = self.close[self.head]
+        if n > 1:
+            mean = sum_r / n
+            volatility = math.sqrt(max(sum_r2 / n - mean * mean, 0.0)) * 100
+        else:
+            volatility = 0.0
+        return {
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "change_percent": (close - open_) / open_ * 100 if open_ else 0.0,
+            "volatility": volatility,
+        }
+
+
+class CandleBook:
+    """Velas 1h/24h/7d de todas las monedas, alimentadas por cada tick de precios.
+
+    Cada tick actualiza la vela en curso de cada ventana en O(1); las
+    consultas de variación, máximo/mínimo y volatilidad solo recorren las
+    pocas velas de la ventana, sin leer archivos ni tablas.
+    """
+
+    def __init__(self, symbols, windows=WINDOWS):
+        self.windows = windows
+        self._rings = {
+            symbol: {label: CandleRing(width, size) for label, (width, size) in windows.items()}
+            for symbol in symbols
+        }
+        self._last = {}
+
+    def _add(self, crypto, timestamp, price):
+        rings = self._rings.get(crypto)
+        if rings is None or price <= 0:
+            return
+        last = self._last.get(crypto)
+        log_return = math.log(price / last) if last else None
+        for ring in rings.values():
+            ring.add(timestamp, price, log_return)
+        self._last[crypto] = price
+
+    def add(self, prices, timestamp=None):
+        """Añade un tick {moneda: precio}"""
+        timestamp = timestamp or time.time()
+        for crypto, price in prices.items():
+            self._add(crypto, timestamp, float(price))
+
+    def load(self, series, now=None):
+        """Reconstruye las velas de la última semana desde la serie en memoria"""
+        since = (now or time.time()) - WEEK
+        for crypto in self._rings:
+            for timestamp, price in series.range(crypto, since):
+                self._add(crypto, timestamp, price)
+
+    def window(self, crypto, label, now=None):
+        rings = self._rings.get(crypto)
+        if rings is None or label not in rings:
+            return None
+        return rings[label].window(now or time.time())
+
+    def summary(self, crypto, now=None):
+        """{ventana: {open, high, low, close, change_percent, volatility}} de una moneda"""
+        now = now or time.time()
+        return {label: self.window(crypto, label, now) for label in self.windows}
@@ -0,0 +1,68 @@
+"""Registro de criptomonedas del bot.
+
+Es la única lista de monedas: la simulación de mercado, el oráculo de
+precios y las opciones de los comandos `/crypto` se generan a partir de
+aquí. Añadir una moneda es añadir una entrada (y su fila en
+`crypto_current_prices`). Los símbolos tienen como máximo `SYMBOL_SIZE`
+caracteres ASCII, el ancho del campo en la serie de precios.
+"""
+from discord import app_commands
+
+from core.timeseries import SYMBOL_SIZE
+
+COINS = {
+    "BTC": {
+        "name": "BitCord",
+        "emoji": "₿",
+        "base_price": 10000,
+        "volatility": (0.98, 1.025),
+        "min_price": 1,
+        "max_price": 100000000,
+        "color": 0xF7931A,
+        "icon": "https://cryptologos.cc/logos/bitcoin-btc-logo.png",
+        "description": "La criptomoneda líder del mercado"
+    },
+    "ETH": {
+        "name": "Etherium",
+        "emoji": "Ξ",
+        "base_price": 3000,
+        "volatility": (0.95, 1.055),
+        "min_price": 1,
+        "max_price": 100000000,
+        "color": 0x627EEA,
+        "icon": "https://cryptologos.cc/logos/ethereum-eth-logo.png",
+        "description": "Plataforma para contratos inteligentes"
+    },
+    "DOG": {
+        "name": "DoggoCoin",
+        "emoji": "🐕",
+        "base_price": 50,
+        "volatility": (0.85, 1.155),
+        "min_price": 1,
+        "max_price": 100000000,
+        "color": 0xF2A900,
+        "icon": "https://cryptologos.cc/logos/dogecoin-doge-logo.png",
+        "description": "La criptomoneda más divertida"
+    }
+}
+
+# El símbolo se guarda tal cual en cada registro de la serie de precios
+for _symbol in COINS:
+    if len(_symbol.encode("ascii")) > SYMBOL_SIZE:
+        raise ValueError(f"❌ Símbolo de moneda demasiado largo: {_symbol} (máximo {SYMBOL_SIZE} caracteres ASCII)")
+
+# Orden estable de las monedas: el índice de cada símbolo es su posición en los vectores
+SYMBOLS = list(COINS)
+COIN_INDEX = {symbol: i for i, symbol in enumerate(SYMBOLS)}
+
+
+def base_prices():
+    return {symbol: coin["base_price"] for symbol, coin in COINS.items()}
+
+
+def coin_choices():
+    """Opciones de slash command para elegir moneda"""
+    return [
+        app_commands.Choice(name=f"{coin['name']} ({symbol})", value=symbol)
+        for symbol, coin in COINS.items()
+    ]
@@ -0,0 +1,555 @@
+from datetime import datetime
+
+from postgrest import AsyncPostgrestClient
+
+from core.cache import TTLCache
+
+INITIAL_BALANCE = 500
+
+
+class Database:
+    """Repositorio asíncrono compartido para jugadores, wallets y precios.
+
+    Todas las consultas pasan por un único cliente PostgREST asíncrono, que
+    mantiene su propio pool de conexiones HTTP con keep-alive. Ningún comando
+    bloquea el event loop de discord.py esperando a Supabase.
+
+    Las filas de `players` se guardan en una caché LRU/TTL que se actualiza
+    con nuestras propias escrituras; Supabase sigue siendo la fuente de verdad.
+    """
+
+    def __init__(self, url, key, timeout=10, cache_size=5000, cache_ttl=60):
+        if not url or not key:
+            raise ValueError("❌ Faltan variables de entorno SUPABASE_URL o SUPABASE_KEY")
+
+        self.base_url = f"{url}/rest/v1"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+        }
+        self.timeout = timeout
+        self._client = None
+        self._balance_listeners = []
+        self._holdings_listeners = []
+        self.players = TTLCache(cache_size, cache_ttl)
+
+        # Contadores expuestos en /api/stats
+        self.clients_created = 0
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    @property
+    def client(self):
+        """Cliente PostgREST del proceso, creado de forma perezosa en el primer uso"""
+        if self._client is None:
+            self._client = AsyncPostgrestClient(self.base_url, headers=self.headers, timeout=self.timeout)
+            self._client.session.event_hooks["request"].append(self._on_request)
+            self.clients_created += 1
+        return self._client
+
+    async def _on_request(self, request):
+        """Engancha el trace de httpcore para contar conexiones nuevas"""
+        self.requests_sent += 1
+        request.extensions["trace"] = self._on_trace
+
+    async def _on_trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    def stats(self):
+        """Contadores de clientes, conexiones y peticiones"""
+        return {
+            "clients_created": self.clients_created,
+            "connections_opened": self.connections_opened,
+            "requests_sent": self.requests_sent,
+            "player_cache": self.players.stats(),
+        }
+
+    def add_balance_listener(self, callback):
+        """Registra `callback(discord_id, balance)`, llamado con cada balance conocido"""
+        self._balance_listeners.append(callback)
+
+    def _notify_balance(self, discord_id, balance):
+        if balance is not None:
+            self.players.update(discord_id, {"balance": balance})
+        for callback in self._balance_listeners:
+            try:
+                callback(discord_id, balance)
+            except Exception as e:
+                print(f"❌ Error en listener de balance: {e}")
+
+    def add_holdings_listener(self, callback):
+        """Registra `callback(discord_id, {moneda: cantidad}, replace)` para cambios de tenencias"""
+        self._holdings_listeners.append(callback)
+
+    def _notify_holdings(self, discord_id, holdings, replace=False):
+        for callback in self._holdings_listeners:
+            try:
+                callback(discord_id, holdings, replace)
+            except Exception as e:
+                print(f"❌ Error en listener de tenencias: {e}")
+
+    def table(self, name):
+        """Devuelve un query builder para la tabla indicada"""
+        return self.client.from_(name)
+
+    async def close(self):
+        """Cierra el pool HTTP del cliente"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ============ JUGADORES ============
+    async def get_player(self, discord_id, username):
+        """Obtiene o crea un jugador (primero en la caché, luego en Supabase)"""
+        discord_id = str(discord_id)
+        cached = self.players.get(discord_id)
+        if cached is not None:
+            return dict(cached)
+
+        try:
+            response = await self.table("players").select("*").eq("discord_id", discord_id).execute()
+
+            if response.data:
+                player = response.data[0]
+                self.players.set(discord_id, dict(player))
+                self._notify_balance(discord_id, player["balance"])
+                return player
+
+            new_player = {
+                "discord_id": discord_id,
+                "username": username,
+                "balance": INITIAL_BALANCE,
+                "daily_streak": 0,
+                "created_at": datetime.now().isoformat()
+            }
+            response = await self.table("players").insert(new_player).execute()
+            if not response.data:
+                return None
+            self.players.set(discord_id, dict(response.data[0]))
+            self._notify_balance(discord_id, response.data[0]["balance"])
+            return response.data[0]
+        except Exception as e:
+            print(f"❌ Error en get_player: {e}")
+            return None
+
+    async def get_players(self, usernames):
+        """Obtiene (o crea) varios jugadores en una sola consulta.
+
+        `usernames` es un diccionario {discord_id: username}. Devuelve un
+        diccionario {discord_id: jugador}.
+        """
+        players = {}
+        missing = []
+        for discord_id in usernames:
+            cached = self.players.get(str(discord_id))
+            if cached is not None:
+                players[str(discord_id)] = dict(cached)
+            else:
+                missing.append(str(discord_id))
+
+        if missing:
+            try:
+                response = await self.table("players").select("*").in_("discord_id", missing).execute()
+                for row in response.data or []:
+                    players[row["discord_id"]] = row
+                    self.players.set(row["discord_id"], dict(row))
+                    self._notify_balance(row["discord_id"], row["balance"])
+            except Exception as e:
+                print(f"❌ Error en get_players: {e}")
+                return {}
+
+        for discord_id, username in usernames.items():
+            if str(discord_id) not in players:
+                player = await self.get_player(discord_id, username)
+                if player:
+                    players[str(discord_id)] = player
+        return players
+
+    async def update_player(self, discord_id, data):
+        """Actualiza múltiples campos de un jugador en Supabase"""
+        try:
+            await self.table("players").update(data).eq("discord_id", str(discord_id)).execute()
+            self.players.update(str(discord_id), data)
+            if "balance" in data:
+                self._notify_balance(str(discord_id), data["balance"])
+            return True
+        except Exception as e:
+            # No sabemos si la escritura llegó: que la próxima lectura vaya a Supabase
+            self.players.invalidate(str(discord_id))
+            print(f"❌ Error en update_player: {e}")
+            return False
+
+    async def update_balance(self, discord_id, amount):
+        """Suma `amount` al balance de un jugador y devuelve el nuevo balance.
+
+        El incremento se hace en el servidor (RPC `increment_balance`) en una
+        sola petición, así que dos comandos simultáneos no pierden cambios.
+        Devuelve None si el jugador no existe.
+        """
+        try:
+            response = await self.client.rpc("increment_balance", {
+                "p_discord_id": str(discord_id),
+                "p_amount": int(amount)
+            }).execute()
+            self._notify_balance(str(discord_id), response.data)
+            return response.data
+        except Exception as e:
+            self.players.invalidate(str(discord_id))
+            print(f"❌ Error en update_balance: {e}")
+            return None
+
+    async def claim_daily(self, discord_id, now, base, streak_step, streak_cap, week_bonus):
+        """Cobra la recompensa diaria en una única transacción (RPC `claim_daily`).
+
+        El servidor bloquea la fila, comprueba `last_daily`, calcula la racha
+        y suma `base + min(racha * streak_step, streak_cap)` (más
+        `week_bonus` cada 7 días) en el mismo UPDATE, así que dos reclamos
+        simultáneos no cobran dos veces.
+
+        Devuelve un diccionario con `status` (`ok`, `already_claimed` o
+        `not_found`), `reward`, `streak`, `bonus` y `balance`, o None si la
+        petición falla.
+        """
+        discord_id = str(discord_id)
+        try:
+            response = await self.client.rpc("claim_daily", {
+                "p_discord_id": discord_id,
+                "p_now": now.isoformat(),
+                "p_base": int(base),
+                "p_streak_step": int(streak_step),
+                "p_streak_cap": int(streak_cap),
+                "p_week_bonus": int(week_bonus)
+            }).execute()
+            result = response.data
+            if result and result.get("status") == "ok":
+                self.players.update(discord_id, {
+                    "daily_streak": result["streak"],
+                    "last_daily": now.isoformat()
+                })
+                self._notify_balance(discord_id, result["balance"])
+            return result
+        except Exception as e:
+            self.players.invalidate(discord_id)
+            print(f"❌ Error en claim_daily: {e}")
+            return None
+
+    async def transfer(self, from_id, to_id, amount, require_funds=True, clamp=False,
+                       from_username=None, to_username=None,
+                       rob_by=None, rob_time=None, rob_cooldown=0):
+        """Mueve saldo entre dos jugadores en una única transacción (RPC `transfer_balance`).
+
+        - `require_funds`: falla con `insufficient_funds` si el origen no cubre `amount`.
+        - `clamp`: limita `amount` al saldo disponible del origen.
+        - `from_username`/`to_username`: crea a los jugadores que no existan.
+        - `rob_by`/`rob_time`/`rob_cooldown`: comprueba y registra el enfriamiento
+          de robo (`last_rob`) de ese jugador dentro de la misma transacción.
+
+        Devuelve un diccionario con `status` (`ok`, `insufficient_funds`,
+        `cooldown` o `not_found`), `amount`, `from_balance`, `to_balance` y
+        `last_rob`, o None si la petición falla.
+        """
+        try:
+            response = await self.client.rpc("transfer_balance", {
+                "p_from": str(from_id),
+                "p_to": str(to_id),
+                "p_amount": int(amount),
+                "p_require_funds": require_funds,
+                "p_clamp": clamp,
+                "p_from_username": from_username,
+                "p_to_username": to_username,
+                "p_rob_by": str(rob_by) if rob_by is not None else None,
+                "p_rob_time": rob_time,
+                "p_rob_cooldown": rob_cooldown
+            }).execute()
+            result = response.data
+            if result and result.get("status") == "ok":
+                self._notify_balance(str(from_id), result["from_balance"])
+                self._notify_balance(str(to_id), result["to_balance"])
+            if result and rob_by is not None and result.get("last_rob") is not None:
+                self.players.update(str(rob_by), {"last_rob": result["last_rob"]})
+            return result
+        except Exception as e:
+            self.players.invalidate(str(from_id))
+            self.players.invalidate(str(to_id))
+            print(f"❌ Error en transfer: {e}")
+            return None
+
+    async def get_leaderboard(self, limit=10):
+        """Obtiene el leaderboard desde Supabase"""
+        try:
+            response = await self.table("players")\
+                .select("username, balance, discord_id")\
+                .order("balance", desc=True)\
+                .limit(limit)\
+                .execute()
+            for row in response.data or []:
+                self._notify_balance(row["discord_id"], row["balance"])
+            return response.data if response.data else []
+        except Exception as e:
+            print(f"❌ Error en get_leaderboard: {e}")
+            return []
+
+    async def get_all_balances(self, page_size=1000):
+        """Obtiene el balance de todos los jugadores.
+
+        Pagina con `range()` porque PostgREST limita el número de filas por
+        respuesta. Es un recorrido completo: usar solo para cargas iniciales.
+        """
+        try:
+            rows = []
+            while True:
+                response = await self.table("players")\
+                    .select("discord_id, balance")\
+                    .order("discord_id")\
+                    .range(len(rows), len(rows) + page_size - 1)\
+                    .execute()
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+        except Exception as e:
+            print(f"❌ Error en get_all_balances: {e}")
+            return []
+
+    # ============ WALLETS DE CRIPTOMONEDAS ============
+    async def get_crypto_wallet(self, discord_id):
+        """Obtiene (o crea) la wallet de criptomonedas de un usuario"""
+        discord_id = str(discord_id)
+        try:
+            response = await self.table("crypto_wallets").select("*").eq("discord_id", discord_id).execute()
+
+            if response.data:
+                return response.data[0]
+
+            new_wallet = {
+                "discord_id": discord_id,
+                "total_invested": 0,
+                "total_withdrawn": 0
+            }
+            response = await self.table("crypto_wallets").insert(new_wallet).execute()
+            return response.data[0] if response.data else new_wallet
+        except Exception as e:
+            print(f"❌ Error en get_crypto_wallet: {e}")
+            return None
+
+    async def get_holdings(self, discord_id):
+        """Tenencias de un usuario, {moneda: cantidad}, en una sola consulta a `crypto_holdings`"""
+        discord_id = str(discord_id)
+        try:
+            response = await self.table("crypto_holdings")\
+                .select("coin, amount")\
+                .eq("discord_id", discord_id)\
+                .execute()
+            holdings = {row["coin"]: row["amount"] for row in response.data or []}
+            self._notify_holdings(discord_id, holdings, replace=True)
+            return holdings
+        except Exception as e:
+            print(f"❌ Error en get_holdings: {e}")
+            return None
+
+    async def get_all_holdings(self, page_size=1000):
+        """Todas las filas de `crypto_holdings` (paginado), o None si falla alguna página.
+
+        Solo para cargas iniciales.
+        """
+        try:
+            rows = []
+            while True:
+                response = await self.table("crypto_holdings")\
+                    .select("discord_id, coin, amount")\
+                    .order("discord_id")\
+                    .order("coin")\
+                    .range(len(rows), len(rows) + page_size - 1)\
+                    .execute()
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+        except Exception as e:
+            print(f"❌ Error en get_all_holdings: {e}")
+            return None
+
+    async def increment_crypto_balance(self, discord_id, crypto, amount, invested=0, withdrawn=0):
+        """Suma `amount` a la tenencia de una criptomoneda (RPC `increment_crypto_balance`).
+
+        `invested` y `withdrawn` se acumulan en los totales de la wallet en la
+        misma petición. Devuelve la nueva cantidad de la criptomoneda, o None
+        si la wallet no existe, si un decremento dejaría la tenencia en
+        negativo (no se aplica nada) o si la petición falla.
+        """
+        try:
+            response = await self.client.rpc("increment_crypto_balance", {
+                "p_discord_id": str(discord_id),
+                "p_crypto": crypto,
+                "p_amount": amount,
+                "p_invested": int(invested),
+                "p_withdrawn": int(withdrawn)
+            }).execute()
+            if response.data is None:
+                print(f"⚠️  increment_crypto_balance rechazado: {discord_id} {crypto} {amount:+}")
+                return None
+            self._notify_holdings(str(discord_id), {crypto: response.data})
+            return response.data
+        except Exception as e:
+            print(f"❌ Error en increment_crypto_balance: {e}")
+            return None
+
+    async def execute_trade(self, discord_id, crypto, side, amount, value):
+        """Compra o vende `amount` de una criptomoneda por `value` monedas (RPC `execute_trade`).
+
+        El cobro y la entrega van en la misma transacción, que exige saldo
+        (compra) o tenencia (venta) suficiente en el propio UPDATE. Devuelve
+        un diccionario con `status` (`ok` o `insufficient`) y, si es `ok`,
+        el nuevo `balance` y `holding`; None si la petición falla.
+        """
+        discord_id = str(discord_id)
+        try:
+            response = await self.client.rpc("execute_trade", {
+                "p_discord_id": discord_id,
+                "p_coin": crypto,
+                "p_side": side,
+                "p_amount": amount,
+                "p_value": int(value)
+            }).execute()
+            result = response.data
+            if result is None:
+                return {"status": "insufficient"}
+            self._notify_balance(discord_id, result["balance"])
+            self._notify_holdings(discord_id, {crypto: result["holding"]})
+            return {"status": "ok", **result}
+        except Exception as e:
+            self.players.invalidate(discord_id)
+            print(f"❌ Error en execute_trade: {e}")
+            return None
+
+    async def update_crypto_wallet(self, discord_id, data):
+        """Actualiza campos de la wallet de un usuario"""
+        try:
+            await self.table("crypto_wallets").update(data).eq("discord_id", str(discord_id)).execute()
+            return True
+        except Exception as e:
+            print(f"❌ Error en update_crypto_wallet: {e}")
+            return False
+
+    # ============ ÓRDENES ============
+    def _notify_order_result(self, result):
+        """Propaga el saldo y la tenencia que devuelven las RPC de órdenes"""
+        order = result.get("order") or result
+        discord_id = str(order["discord_id"])
+        if result.get("balance") is not None:
+            self._notify_balance(discord_id, result["balance"])
+        if result.get("holding") is not None:
+            self._notify_holdings(discord_id, {order["coin"]: result["holding"]})
+
+    async def get_open_orders(self, page_size=1000):
+        """Todas las órdenes abiertas de `crypto_orders` (paginado), o None si falla alguna página.
+
+        Solo para cargas iniciales.
+        """
+        try:
+            rows = []
+            while True:
+                response = await self.table("crypto_orders")\
+                    .select("id, discord_id, coin, side, kind, amount, price, reserved")\
+                    .eq("status", "open")\
+                    .order("id")\
+                    .range(len(rows), len(rows) + page_size - 1)\
+                    .execute()
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+        except Exception as e:
+            print(f"❌ Error en get_open_orders: {e}")
+            return None
+
+    async def place_order(self, discord_id, crypto, side, kind, amount, price):
+        """Crea una orden límite/stop reservando sus fondos (RPC `place_crypto_order`).
+
+        Una compra reserva `amount * price` monedas del saldo; una venta
+        reserva `amount` de la criptomoneda. Devuelve un diccionario con
+        `status` (`ok`, `insufficient_funds` o `insufficient_crypto`),
+        `order`, `balance` y `holding`, o None si la petición falla.
+        """
+        try:
+            response = await self.client.rpc("place_crypto_order", {
+                "p_discord_id": str(discord_id),
+                "p_coin": crypto,
+                "p_side": side,
+                "p_kind": kind,
+                "p_amount": amount,
+                "p_price": int(price)
+            }).execute()
+            result = response.data
+            if result and result.get("status") == "ok":
+                self._notify_order_result(result)
+            return result
+        except Exception as e:
+            self.players.invalidate(str(discord_id))
+            print(f"❌ Error en place_order: {e}")
+            return None
+
+    async def cancel_order(self, order_id, discord_id):
+        """Cancela una orden abierta del usuario y devuelve lo reservado (RPC `cancel_crypto_order`).
+
+        Devuelve un diccionario con `status` (`ok` o `not_found`), `order`,
+        `balance` y `holding`, o None si la petición falla.
+        """
+        try:
+            response = await self.client.rpc("cancel_crypto_order", {
+                "p_order_id": int(order_id),
+                "p_discord_id": str(discord_id)
+            }).execute()
+            result = response.data
+            if result and result.get("status") == "ok":
+                self._notify_order_result(result)
+            return result
+        except Exception as e:
+            self.players.invalidate(str(discord_id))
+            print(f"❌ Error en cancel_order: {e}")
+            return None
+
+    async def settle_orders(self, fills):
+        """Liquida las órdenes disparadas en un tick con una sola petición (RPC `settle_crypto_orders`).
+
+        `fills` es una lista de {"id": orden, "price": precio de ejecución}.
+        Devuelve la lista de órdenes liquidadas (con el nuevo `balance` y
+        `holding` de cada usuario) o None si la petición falla.
+        """
+        try:
+            response = await self.client.rpc("settle_crypto_orders", {
+                "p_fills": [{"id": fill["id"], "price": int(fill["price"])} for fill in fills]
+            }).execute()
+            results = response.data or []
+            for result in results:
+                self._notify_order_result(result)
+            return results
+        except Exception as e:
+            print(f"❌ Error en settle_orders: {e}")
+            return None
+
+    # ============ PRECIOS ============
+    async def get_current_prices(self):
+        """Obtiene los precios actuales de `crypto_current_prices`"""
+        try:
+            response = await self.table("crypto_current_prices").select("*").execute()
+            return {item["crypto"]: int(item["price"]) for item in response.data or []}
+        except Exception as e:
+            print(f"❌ Error al obtener precios: {e}")
+            return {}
+
+    async def record_price_tick(self, prices):
+        """Guarda un tick de precios con una sola petición (RPC `record_price_tick`).
+
+        Actualiza `crypto_current_prices` para todas las monedas e inserta el
+        registro histórico en `crypto_prices` dentro de la misma transacción.
+        """
+        try:
+            await self.client.rpc("record_price_tick", {
+                "p_prices": {crypto: int(price) for crypto, price in prices.items()}
+            }).execute()
+            return True
+        except Exception as e:
+            print(f"❌ Error en record_price_tick: {e}")
+            return False
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class HoldingsBook:
+    """Tenencias de criptomonedas de todos los usuarios en memoria.
+
+    Una matriz (usuarios × monedas) de float64: cada usuario ocupa una fila y
+    cada moneda la columna de su índice en `symbols`. Valorar una wallet es
+    el producto escalar de su fila por el vector de precios. Se alimenta de
+    las lecturas y escrituras de `crypto_holdings` que notifica `Database`.
+    """
+
+    def __init__(self, symbols, capacity=1024):
+        self.symbols = list(symbols)
+        self.coin_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._rows = {}
+        self._ids = []
+        self.matrix = np.zeros((capacity, len(self.symbols)))
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _row(self, discord_id):
+        discord_id = str(discord_id)
+        row = self._rows.get(discord_id)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self.matrix):
+                # Crecer duplicando para que añadir usuarios sea O(1) amortizado
+                self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+            self._rows[discord_id] = row
+            self._ids.append(discord_id)
+        return row
+
+    async def load(self, db):
+        """Carga todas las tenencias desde Supabase. Si falla, `loaded` sigue en False para reintentar"""
+        rows = await db.get_all_holdings()
+        if rows is None:
+            print("⚠️  No se pudieron cargar las tenencias, se reintentará en el próximo tick")
+            return False
+        for row in rows:
+            self.update(row["discord_id"], {row["coin"]: row["amount"]})
+        self.loaded = True
+        print(f"✅ Tenencias de criptomonedas cargadas ({len(self)} wallets)")
+        return True
+
+    def update(self, discord_id, holdings, replace=False):
+        """Aplica {moneda: cantidad}. Con `replace` las monedas ausentes quedan a 0"""
+        row = self._row(discord_id)
+        if replace:
+            self.matrix[row] = 0.0
+        for coin, amount in holdings.items():
+            column = self.coin_index.get(coin)
+            if column is not None:
+                self.matrix[row, column] = amount or 0.0
+
+    def snapshot(self):
+        """(ids, matriz) con una copia de las filas ocupadas"""
+        n = len(self._ids)
+        return list(self._ids), self.matrix[:n].copy()
+
+    def vector(self, discord_id):
+        """Cantidades del usuario en el orden de `symbols` (ceros si no tiene nada)"""
+        row = self._rows.get(str(discord_id))
+        if row is None:
+            return np.zeros(len(self.symbols))
+        return self.matrix[row].copy()
+
+    def holdings(self, discord_id):
+        """{moneda: cantidad} con las monedas que el usuario tiene"""
+        return {
+            symbol: float(amount)
+            for symbol, amount in zip(self.symbols, self.vector(discord_id))
+            if amount > 0
+        }
+
+    def value(self, discord_id, prices):
+        """Valor de la wallet: fila del usuario · vector de precios"""
+        return float(self.vector(discord_id) @ prices)
@@ -0,0 +1,147 @@
+import zlib
+
+from icalendar import Calendar
+
+
+class CalendarInfo:
+    """Datos de un calendario (nombre, color, emoji) compartidos por todos sus eventos"""
+
+    __slots__ = ('id', 'name', 'color', 'emoji')
+
+    def __init__(self, calendar_id, name, color, emoji):
+        self.id = calendar_id
+        self.name = name
+        self.color = color
+        self.emoji = emoji
+
+
+class Event:
+    """Evento de calendario compacto.
+
+    Con `__slots__` no hay diccionario por evento; lo que es común a todo el
+    calendario vive en un único `CalendarInfo` al que apunta `source`, y los
+    textos que se repiten entre eventos (títulos, lugares) se internan.
+    `timestamp` es el inicio como marca Unix, la clave de los índices.
+    `recurrence_id` (marca Unix) indica la ocurrencia de una serie que este
+    evento sustituye.
+    """
+
+    __slots__ = ('summary', 'description', 'start', 'end', 'location', 'url', 'uid', 'source', 'timestamp',
+                 'all_day', 'recurrence_id')
+
+    def __init__(self, summary, description, start, end, location, url, uid, source,
+                 all_day=False, recurrence_id=None):
+        self.summary = summary
+        self.description = description
+        self.start = start
+        self.end = end
+        self.location = location
+        self.url = url
+        self.uid = uid
+        self.source = source
+        self.timestamp = start.timestamp()
+        self.all_day = all_day
+        self.recurrence_id = recurrence_id
+
+    def occurrence(self, start, end):
+        """Copia del evento en otra fecha (ocurrencia de una serie)"""
+        return Event(self.summary, self.description, start, end, self.location, self.url,
+                     self.uid, self.source, self.all_day)
+
+    @property
+    def calendar(self):
+        return self.source.id
+
+    @property
+    def calendar_name(self):
+        return self.source.name
+
+    @property
+    def color(self):
+        return self.source.color
+
+    @property
+    def emoji(self):
+        return self.source.emoji
+
+    @property
+    def time_label(self):
+        """Hora de inicio para mostrar ("Todo el día" si no tiene hora)"""
+        return "Todo el día" if self.all_day else self.start.strftime('%H:%M')
+
+    def __repr__(self):
+        return f"Event({self.summary!r}, {self.start.isoformat()}, {self.calendar!r})"
+
+
+def _ical(value):
+    """Forma iCal de una propiedad (también de listas, p. ej. varias líneas EXDATE)"""
+    if isinstance(value, list):
+        return ",".join(_ical(item) for item in value)
+    data = value.to_ical() if hasattr(value, 'to_ical') else value
+    return data.decode() if isinstance(data, bytes) else str(data)
+
+
+def component_key(component):
+    """Clave estable de un VEVENT: UID (+ RECURRENCE-ID si modifica una ocurrencia de una serie)"""
+    key = str(component.get('uid', ''))
+    if not key:
+        start = component.get('dtstart')
+        key = f"{component.get('summary', '')}|{start.to_ical().decode() if start is not None else ''}"
+    recurrence = component.get('recurrence-id')
+    if recurrence is not None:
+        key = f"{key}|{recurrence.to_ical().decode()}"
+    return key
+
+
+def component_version(component):
+    """Versión de un VEVENT: SEQUENCE + LAST-MODIFIED.
+
+    Si el feed no trae LAST-MODIFIED se usa una huella de los campos que
+    se muestran (DTSTAMP no sirve: algunos feeds lo cambian en cada descarga).
+    La huella es estable entre procesos para poder guardarla en disco.
+    """
+    sequence = int(component.get('sequence', 0))
+    modified = component.get('last-modified')
+    if modified is not None:
+        return sequence, modified.to_ical().decode()
+    fields = ('dtstart', 'dtend', 'summary', 'description', 'location', 'url', 'rrule', 'rdate', 'exdate')
+    fingerprint = "\x1f".join(_ical(component.get(field, '')) for field in fields)
+    return sequence, zlib.crc32(fingerprint.encode())
+
+
+def parse_feed(content, previous, parse_event):
+    """Parsea un feed iCal y lo compara con la versión anterior.
+
+    `previous` es {clave: (versión, evento)} de la sincronización anterior.
+    Solo los VEVENT nuevos o con otra versión pasan por `parse_event`; el
+    resto reutiliza el evento ya construido. Es una función pura para poder
+    ejecutarla en un hilo aparte.
+
+    Devuelve (entradas, añadidos, eliminados): las nuevas entradas
+    {clave: (versión, evento)} y las listas de (clave, evento) que hay que
+    añadir y quitar de los índices.
+    """
+    entries = {}
+    added = []
+    for component in Calendar.from_ical(content).walk('VEVENT'):
+        key = component_key(component)
+        # UID repetido en el mismo feed: se desambigua por orden de aparición
+        duplicate = 1
+        base = key
+        while key in entries:
+            duplicate += 1
+            key = f"{base}#{duplicate}"
+
+        version = component_version(component)
+        entry = previous.get(key)
+        if entry is None or entry[0] != version:
+            entry = (version, parse_event(component))
+            if entry[1] is not None:
+                added.append((key, entry[1]))
+        entries[key] = entry
+
+    removed = [
+        (key, entry[1]) for key, entry in previous.items()
+        if entry[1] is not None and entries.get(key) is not entry
+    ]
+    return entries, added, removed
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime
+
+import discord
+
+LEADERBOARD_TITLE = "🏆 TABLA DE LÍDERES GLOBAL"
+
+
+class LeaderboardPublisher:
+    """Publica el leaderboard global en un único mensaje persistente.
+
+    Los comandos solo llaman a `mark_dirty()` (síncrono, no espera a nada).
+    Una tarea en segundo plano agrupa las marcas y refresca el mensaje como
+    máximo una vez cada `interval` segundos, editándolo en lugar de purgar
+    el canal y volver a publicar.
+    """
+
+    def __init__(self, bot, channel_id, interval=30):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.interval = interval
+        self._dirty = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._message = None
+        self._task = None
+
+        # Contadores para ver cuánto se agrupa
+        self.marks = 0
+        self.refreshes = 0
+
+    def mark_dirty(self):
+        """Marca el leaderboard como desactualizado"""
+        self.marks += 1
+        self._dirty.set()
+
+    def start(self):
+        """Arranca la tarea en segundo plano (idempotente)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        return {
+            "marks": self.marks,
+            "refreshes": self.refreshes,
+            "interval": self.interval,
+        }
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            await self._dirty.wait()
+            self._dirty.clear()
+            await self.refresh()
+            # Las marcas que lleguen mientras tanto se agrupan en el siguiente refresco
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Reconstruye el embed y edita el mensaje. Devuelve True si se publicó"""
+        async with self._lock:
+            channel = self.bot.get_channel(self.channel_id) if self.channel_id else None
+            if not channel:
+                print(f"❌ Canal de leaderboard no encontrado (ID: {self.channel_id})")
+                return False
+
+            try:
+                embed = await self.build_embed()
+                message = await self._get_message(channel)
+
+                if message:
+                    try:
+                        await message.edit(embed=embed)
+                    except discord.NotFound:
+                        message = None
+
+                if not message:
+                    self._message = await channel.send(embed=embed)
+
+                self.refreshes += 1
+                print("✅ Leaderboard global actualizado")
+                return True
+            except Exception as e:
+                print(f"❌ Error actualizando leaderboard: {e}")
+                return False
+
+    async def _get_message(self, channel):
+        """Recupera el mensaje persistente del bot (tras un reinicio lo busca en el historial)"""
+        if self._message is not None:
+            return self._message
+
+        async for message in channel.history(limit=50):
+            if message.author == self.bot.user and message.embeds \
+                    and message.embeds[0].title == LEADERBOARD_TITLE:
+                self._message = message
+                return message
+        return None
+
+    async def build_embed(self):
+        db = self.bot.db
+        leaderboard = await db.get_leaderboard(10)
+
+        embed = discord.Embed(
+            title=LEADERBOARD_TITLE,
+            description="Ranking de jugadores por monedas totales",
+            color=discord.Color.gold()
+        )
+
+        if not leaderboard:
+            embed.description = "📭 No hay jugadores registrados todavía."
+        else:
+            for i, player in enumerate(leaderboard[:10], start=1):
+                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+                embed.add_field(
+                    name=f"{medal} {player['username']}",
+                    value=f"```{player['balance']:,} monedas```",
+                    inline=False
+                )
+
+        stats = self.bot.ranking.aggregates()
+
+        embed.add_field(
+            name="📊 ESTADÍSTICAS GLOBALES",
+            value=(
+                f"**Jugadores totales:** {stats['total_players']}\n"
+                f"**Riqueza total:** {stats['total_wealth']:,} monedas\n"
+                f"**Promedio por jugador:** {stats['average']:,}"
+            ),
+            inline=False
+        )
+
+        embed.set_footer(text="Actualizado automáticamente")
+        embed.timestamp = datetime.now()
+        return embed
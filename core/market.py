@@ -0,0 +1,74 @@
+import numpy as np
+
+
+def _erf(x):
+    """Aproximación vectorizada de erf (Abramowitz y Stegun 7.1.26, error < 1.5e-7)"""
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return sign * (1.0 - poly * np.exp(-x * x))
+
+
+class MarketSimulator:
+    """Motor de simulación de precios para N monedas con NumPy.
+
+    Precios, límites de volatilidad y mínimos/máximos se guardan como
+    vectores, así que un tick es una única operación vectorizada sin importar
+    cuántas monedas haya. Con `correlation` > 0 los choques comparten un
+    factor común de mercado; con 0 cada moneda se mueve de forma
+    independiente (uniforme en su rango, como antes). Un `seed` fijo permite
+    reproducir exactamente una secuencia de ticks.
+    """
+
+    def __init__(self, coins, seed=None, correlation=0.0):
+        self.symbols = list(coins)
+        self.base = np.array([coin["base_price"] for coin in coins.values()], dtype=float)
+        self.low = np.array([coin["volatility"][0] for coin in coins.values()], dtype=float)
+        self.high = np.array([coin["volatility"][1] for coin in coins.values()], dtype=float)
+        self.min_price = np.array([coin["min_price"] for coin in coins.values()], dtype=float)
+        self.max_price = np.array([coin["max_price"] for coin in coins.values()], dtype=float)
+        self.correlation = min(max(correlation, 0.0), 1.0)
+        self.rng = np.random.default_rng(seed)
+
+    def to_vector(self, prices):
+        """{moneda: precio} → vector en el orden de `symbols` (precio base si falta o no es válido)"""
+        vector = np.array([prices.get(symbol) or 0 for symbol in self.symbols], dtype=float)
+        return np.where(vector > 0, vector, self.base)
+
+    def to_dict(self, vector):
+        return {symbol: int(price) for symbol, price in zip(self.symbols, vector)}
+
+    def _uniforms(self, ticks):
+        """Matriz (ticks, monedas) de valores en [0, 1), correlacionados entre monedas"""
+        shape = (ticks, len(self.symbols))
+        if self.correlation == 0:
+            return self.rng.random(shape)
+
+        # Factor común + ruido propio, llevados de normal a uniforme con la CDF normal
+        common = self.rng.standard_normal((ticks, 1))
+        own = self.rng.standard_normal(shape)
+        z = np.sqrt(self.correlation) * common + np.sqrt(1 - self.correlation) * own
+        return 0.5 * (1.0 + _erf(z / np.sqrt(2.0)))
+
+    def _apply(self, prices, uniforms):
+        multipliers = self.low + (self.high - self.low) * uniforms
+        return np.rint(np.clip(prices * multipliers, self.min_price, self.max_price))
+
+    def step(self, prices):
+        """Un tick: vector de precios → nuevo vector de precios (enteros)"""
+        return self._apply(prices, self._uniforms(1)[0])
+
+    def fast_forward(self, prices, ticks):
+        """Simula `ticks` ticks seguidos y devuelve la matriz (ticks, monedas) de precios.
+
+        Los choques se generan todos de una vez; solo el redondeo y los
+        límites, que dependen del precio anterior, se aplican tick a tick.
+        """
+        uniforms = self._uniforms(ticks)
+        path = np.empty((ticks, len(self.symbols)))
+        current = np.asarray(prices, dtype=float)
+        for i in range(ticks):
+            current = self._apply(current, uniforms[i])
+            path[i] = current
+        return path
@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+
+
+class NetWorthIndex:
+    """Patrimonio de todos los usuarios (monedas + criptomonedas) en memoria.
+
+    En cada tick de precios se revalúan todas las wallets de una vez: la
+    matriz de tenencias por el vector de precios. El resultado se combina
+    con los balances del índice de ranking (más lo reservado por órdenes
+    abiertas) y se guarda, de modo que el ranking "incluyendo cripto" y el
+    patrimonio de un usuario se sirven sin consultas.
+    """
+
+    def __init__(self, top_size=25):
+        self.top_size = top_size
+        self._crypto = {}
+        self._top = []
+        self.updated_at = None
+        self.last_revalue_ms = None
+
+    @staticmethod
+    def add_reserved(ids, matrix, balances, symbols, coins, crypto):
+        """Suma a los balances y a la matriz lo reservado por órdenes abiertas.
+
+        Al crear una orden, las monedas o la cripto salen del saldo y de las
+        tenencias, pero siguen siendo del usuario. `coins` y `crypto` son
+        los de `OrderBook.reserved()`. Trabaja sobre las copias del snapshot.
+        """
+        for discord_id, amount in coins.items():
+            balances[discord_id] = balances.get(discord_id, 0) + amount
+
+        rows = {discord_id: row for row, discord_id in enumerate(ids)}
+        missing = [discord_id for discord_id in crypto if discord_id not in rows]
+        if missing:
+            rows.update((discord_id, len(ids) + i) for i, discord_id in enumerate(missing))
+            ids = ids + missing
+            matrix = np.vstack([matrix, np.zeros((len(missing), len(symbols)))])
+        columns = {symbol: column for column, symbol in enumerate(symbols)}
+        for discord_id, held in crypto.items():
+            for coin, amount in held.items():
+                if coin in columns:
+                    matrix[rows[discord_id], columns[coin]] += amount
+        return ids, matrix, balances
+
+    @staticmethod
+    def compute(ids, matrix, prices, balances, top_size):
+        """Cálculo puro (sin estado compartido) para poder ejecutarlo en un hilo"""
+        crypto_values = matrix @ prices
+        crypto = dict(zip(ids, crypto_values.tolist()))
+
+        player_ids = list(balances.keys() | crypto.keys())
+        net = np.fromiter(
+            (balances.get(i, 0) + crypto.get(i, 0.0) for i in player_ids),
+            dtype=float, count=len(player_ids)
+        )
+
+        k = min(top_size, len(player_ids))
+        if k == 0:
+            return crypto, []
+        best = np.argpartition(-net, k - 1)[:k]
+        best = best[np.argsort(-net[best])]
+        top = [
+            {
+                "discord_id": player_ids[i],
+                "net_worth": float(net[i]),
+                "balance": balances.get(player_ids[i], 0),
+                "crypto_value": crypto.get(player_ids[i], 0.0),
+            }
+            for i in best
+        ]
+        return crypto, top
+
+    def publish(self, crypto, top, seconds):
+        self._crypto = crypto
+        self._top = top
+        self.updated_at = time.time()
+        self.last_revalue_ms = round(seconds * 1000, 2)
+
+    def crypto_value(self, discord_id):
+        """Valor de las criptomonedas del usuario al precio del último tick"""
+        return self._crypto.get(str(discord_id), 0.0)
+
+    def net_worth(self, discord_id, balance):
+        return balance + self.crypto_value(discord_id)
+
+    def top(self, limit=10):
+        return self._top[:limit]
+
+    def stats(self):
+        return {
+            "wallets": len(self._crypto),
+            "updated_at": self.updated_at,
+            "last_revalue_ms": self.last_revalue_ms,
+        }
@@ -0,0 +1,151 @@
+import heapq
+
+BUY, SELL = "buy", "sell"
+LIMIT, STOP = "limit", "stop"
+
+
+class OrderBook:
+    """Órdenes límite y stop abiertas de todas las monedas, en memoria.
+
+    Cada moneda tiene dos montículos ordenados por precio de disparo:
+    `below` (compra límite y venta stop, se disparan cuando el precio baja
+    hasta el disparo; la cima es el disparo más alto) y `above` (venta
+    límite, se disparan cuando el precio sube; la cima es el más bajo). En
+    cada tick solo se sacan las k órdenes disparadas, O(k log n). Las órdenes
+    canceladas se descartan al llegar a la cima (borrado perezoso).
+    """
+
+    def __init__(self, symbols):
+        self._below = {symbol: [] for symbol in symbols}
+        self._above = {symbol: [] for symbol in symbols}
+        self._orders = {}
+        self._by_user = {}
+        self._stale = 0
+        self.loaded = False
+
+        # Contadores de ejecución
+        self.filled = 0
+        self.last_match = 0
+        self.last_settle_ms = None
+
+    def __len__(self):
+        return len(self._orders)
+
+    @staticmethod
+    def triggers_below(order):
+        """True si la orden se dispara cuando el precio baja hasta su precio"""
+        return order["side"] == BUY or order["kind"] == STOP
+
+    async def load(self, db):
+        """Carga las órdenes abiertas desde Supabase. Si falla, `loaded` sigue en False para reintentar"""
+        orders = await db.get_open_orders()
+        if orders is None:
+            print("⚠️  No se pudieron cargar las órdenes abiertas, se reintentará en el próximo tick")
+            return False
+        for order in orders:
+            self.add(order)
+        self.loaded = True
+        print(f"✅ Órdenes abiertas cargadas ({len(self)})")
+        return True
+
+    def add(self, order):
+        order_id = order["id"]
+        if order_id in self._orders:
+            return
+        self._orders[order_id] = order
+        self._by_user.setdefault(order["discord_id"], set()).add(order_id)
+        if self.triggers_below(order):
+            heapq.heappush(self._below[order["coin"]], (-order["price"], order_id))
+        else:
+            heapq.heappush(self._above[order["coin"]], (order["price"], order_id))
+
+    def _forget(self, order_id):
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return None
+        user_orders = self._by_user.get(order["discord_id"])
+        if user_orders is not None:
+            user_orders.discard(order_id)
+            if not user_orders:
+                del self._by_user[order["discord_id"]]
+        return order
+
+    def remove(self, order_id):
+        """Saca una orden del libro (cancelación). Su entrada en el montículo queda obsoleta"""
+        order = self._forget(order_id)
+        if order is not None:
+            self._stale += 1
+            if self._stale > len(self._orders) + 64:
+                self._compact()
+        return order
+
+    def _compact(self):
+        """Reconstruye los montículos sin las entradas de órdenes canceladas"""
+        for heaps in (self._below, self._above):
+            for symbol, heap in heaps.items():
+                heaps[symbol] = [entry for entry in heap if entry[1] in self._orders]
+                heapq.heapify(heaps[symbol])
+        self._stale = 0
+
+    def get(self, order_id):
+        return self._orders.get(order_id)
+
+    def orders_of(self, discord_id):
+        """Órdenes abiertas de un usuario, de la más antigua a la más reciente"""
+        ids = self._by_user.get(str(discord_id), ())
+        return [self._orders[order_id] for order_id in sorted(ids)]
+
+    def reserved(self):
+        """Lo apartado por las órdenes abiertas: ({usuario: monedas}, {usuario: {moneda: cantidad}})"""
+        coins = {}
+        crypto = {}
+        for order in self._orders.values():
+            discord_id = order["discord_id"]
+            if order["side"] == BUY:
+                coins[discord_id] = coins.get(discord_id, 0) + (order.get("reserved") or 0)
+            else:
+                held = crypto.setdefault(discord_id, {})
+                held[order["coin"]] = held.get(order["coin"], 0.0) + order["amount"]
+        return coins, crypto
+
+    def match(self, prices):
+        """Saca del libro y devuelve las órdenes que disparan los precios {moneda: precio}"""
+        triggered = []
+        for symbol, price in prices.items():
+            below = self._below.get(symbol)
+            while below and -below[0][0] >= price:
+                _, order_id = heapq.heappop(below)
+                order = self._forget(order_id)
+                if order is not None:
+                    triggered.append(order)
+                else:
+                    self._stale = max(self._stale - 1, 0)
+
+            above = self._above.get(symbol)
+            while above and above[0][0] <= price:
+                _, order_id = heapq.heappop(above)
+                order = self._forget(order_id)
+                if order is not None:
+                    triggered.append(order)
+                else:
+                    self._stale = max(self._stale - 1, 0)
+        self.last_match = len(triggered)
+        return triggered
+
+    def restore(self, orders):
+        """Devuelve al libro órdenes disparadas cuya liquidación falló"""
+        for order in orders:
+            self.add(order)
+
+    def record_settlement(self, filled, seconds):
+        self.filled += filled
+        self.last_settle_ms = round(seconds * 1000, 2)
+
+    def stats(self):
+        return {
+            "open": len(self._orders),
+            "filled": self.filled,
+            "last_match": self.last_match,
+            "last_settle_ms": self.last_settle_ms,
+            "loaded": self.loaded,
+        }
@@ -0,0 +1,65 @@
+import time
+
+
+class PriceOracle:
+    """Precios actuales de las criptomonedas en memoria del proceso.
+
+    La tarea de actualización de precios es la única que escribe (`publish`);
+    los comandos `/crypto` leen con `snapshot()` sin consultar Supabase ni
+    leer archivos. Cada publicación incrementa `version` y guarda la hora en
+    `updated_at`, de modo que se puede saber si un precio está desfasado.
+    """
+
+    def __init__(self, defaults):
+        self._entries = {
+            crypto: {"price": price, "change_percent": 0.0, "original": price}
+            for crypto, price in defaults.items()
+        }
+        self.version = 0
+        self.updated_at = None
+
+        # Duración de los ticks de actualización
+        self.ticks = 0
+        self.last_tick_ms = None
+        self.max_tick_ms = 0.0
+
+    def publish(self, prices, history=None):
+        """Publica nuevos precios. `history` aporta `change_percent`, `original`, etc. por moneda"""
+        history = history or {}
+        entries = dict(self._entries)
+        for crypto, price in prices.items():
+            previous = entries.get(crypto, {"change_percent": 0.0, "original": price})
+            entries[crypto] = {**previous, **history.get(crypto, {}), "price": price}
+        # Se sustituye el diccionario entero: los lectores nunca ven una mezcla
+        self._entries = entries
+        self.version += 1
+        self.updated_at = time.time()
+
+    def record_tick(self, seconds):
+        """Registra cuánto tardó un tick completo (cálculo, BD, serie y publicación)"""
+        ms = round(seconds * 1000, 2)
+        self.ticks += 1
+        self.last_tick_ms = ms
+        self.max_tick_ms = max(self.max_tick_ms, ms)
+
+    def price(self, crypto):
+        entry = self._entries.get(crypto)
+        return entry["price"] if entry else None
+
+    def prices(self):
+        """{moneda: precio}"""
+        return {crypto: entry["price"] for crypto, entry in self._entries.items()}
+
+    def snapshot(self):
+        """{moneda: {price, change_percent, original, ...}}"""
+        return {crypto: dict(entry) for crypto, entry in self._entries.items()}
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "ticks": self.ticks,
+            "last_tick_ms": self.last_tick_ms,
+            "max_tick_ms": self.max_tick_ms,
+            "prices": self.prices(),
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from sortedcontainers import SortedList
+
+
+class BalanceIndex:
+    """Índice en memoria de los balances de todos los jugadores.
+
+    Mantiene una lista ordenada de balances y un diccionario
+    {discord_id: balance}, de modo que la posición de un jugador y la riqueza
+    total se obtienen en O(log n) sin descargar la tabla `players`. Se
+    alimenta de los cambios de balance que notifica `Database` y se
+    reconcilia periódicamente contra Supabase.
+    """
+
+    def __init__(self, reconcile_interval=600):
+        self._balances = {}
+        self._sorted = SortedList()
+        self.total_wealth = 0
+        self.loaded = False
+        self.reconcile_interval = reconcile_interval
+        self._task = None
+
+        # Métricas de la última reconciliación
+        self.reconciled_at = None
+        self.last_drift = 0
+
+    def __len__(self):
+        return len(self._balances)
+
+    def __contains__(self, discord_id):
+        return str(discord_id) in self._balances
+
+    async def load(self, db):
+        """Carga (o recarga) el índice completo desde Supabase"""
+        rows = await db.get_all_balances()
+        if not rows and self.loaded:
+            # Probablemente un error de red: mejor conservar lo que tenemos
+            return
+
+        balances = {row["discord_id"]: row["balance"] for row in rows}
+        total_wealth = sum(balances.values())
+        if self.loaded:
+            self.last_drift = total_wealth - self.total_wealth
+
+        self._balances = balances
+        self._sorted = SortedList(balances.values())
+        self.total_wealth = total_wealth
+        self.reconciled_at = time.time()
+
+        if not self.loaded:
+            self.loaded = True
+            print(f"✅ Índice de balances cargado ({len(balances)} jugadores)")
+        elif self.last_drift:
+            print(f"⚠️  Índice de balances reconciliado (desfase: {self.last_drift:,} monedas)")
+
+    def start(self, db):
+        """Carga el índice y lo reconcilia cada `reconcile_interval` segundos (idempotente)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(db))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, db):
+        while True:
+            try:
+                await self.load(db)
+            except Exception as e:
+                print(f"❌ Error reconciliando índice de balances: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    def set(self, discord_id, balance):
+        """Registra el balance actual de un jugador"""
+        if balance is None:
+            return
+        discord_id = str(discord_id)
+        old = self._balances.get(discord_id)
+        if old == balance:
+            return
+        if old is not None:
+            self._sorted.remove(old)
+            self.total_wealth -= old
+        self._balances[discord_id] = balance
+        self._sorted.add(balance)
+        self.total_wealth += balance
+
+    def snapshot(self):
+        """Copia {discord_id: balance}"""
+        return dict(self._balances)
+
+    def balance(self, discord_id):
+        return self._balances.get(str(discord_id))
+
+    def rank(self, discord_id):
+        """Posición del jugador (1 = más rico). Los empates comparten posición"""
+        balance = self._balances.get(str(discord_id))
+        if balance is None:
+            return None
+        return len(self._sorted) - self._sorted.bisect_right(balance) + 1
+
+    def aggregates(self):
+        """Jugadores totales, riqueza total y promedio, en O(1)"""
+        total_players = len(self._balances)
+        return {
+            "total_players": total_players,
+            "total_wealth": self.total_wealth,
+            "average": self.total_wealth // total_players if total_players > 0 else 0,
+        }
+
+    def stats(self):
+        return {
+            **self.aggregates(),
+            "loaded": self.loaded,
+            "reconciled_at": self.reconciled_at,
+            "last_drift": self.last_drift,
+        }
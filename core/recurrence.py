@@ -0,0 +1,156 @@
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from dateutil.rrule import rruleset, rrulestr
+
+DAY = 24 * 3600
+
+# Las series se expanden por tramos fijos de 30 días, cacheados por serie
+CHUNK = 30 * DAY
+MAX_CHUNKS = 12
+# Tope de ocurrencias por tramo (protege de reglas absurdas tipo FREQ=SECONDLY)
+MAX_PER_CHUNK = 1000
+# Límite de una consulta sin fin (p. ej. "eventos futuros")
+HORIZON = 365 * DAY
+
+UNTIL = re.compile(r"UNTIL=(\d{8}T\d{6})Z")
+
+
+def localize(naive, tz):
+    """Hora local sin zona → datetime con la zona del calendario (pytz o zoneinfo)"""
+    if hasattr(tz, 'localize'):
+        return tz.localize(naive)
+    return naive.replace(tzinfo=tz)
+
+
+def local_rule(rule, tz):
+    """Pasa el UNTIL en UTC de una RRULE a hora local: la expansión se hace sin zona"""
+    def to_local(match):
+        until = datetime.strptime(match.group(1), "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        return f"UNTIL={until.astimezone(tz).strftime('%Y%m%dT%H%M%S')}"
+    return UNTIL.sub(to_local, rule)
+
+
+class Series:
+    """Evento recurrente (RRULE/RDATE/EXDATE) que se expande bajo demanda.
+
+    Nunca se materializa la serie completa: una consulta pide las
+    ocurrencias de un rango y solo se expanden los tramos de 30 días que lo
+    cubren, que quedan en una caché LRU de la serie. La expansión se hace en
+    hora local sin zona y cada ocurrencia se localiza después, así los
+    cambios de horario de verano no desplazan los eventos.
+    """
+
+    __slots__ = ('template', 'rules', 'rdates', 'exdates', '_set', '_chunks')
+
+    def __init__(self, template, rules=(), rdates=(), exdates=()):
+        self.template = template
+        self.rules = list(rules)
+        self.rdates = list(rdates)
+        self.exdates = list(exdates)
+        self._set = None
+        self._chunks = OrderedDict()
+
+    def __getstate__(self):
+        # La regla compilada y la caché se reconstruyen al cargar
+        return self.template, self.rules, self.rdates, self.exdates
+
+    def __setstate__(self, state):
+        self.template, self.rules, self.rdates, self.exdates = state
+        self._set = None
+        self._chunks = OrderedDict()
+
+    # Lo que usan los índices, delegado en la plantilla
+    @property
+    def summary(self):
+        return self.template.summary
+
+    @property
+    def description(self):
+        return self.template.description
+
+    @property
+    def start(self):
+        return self.template.start
+
+    @property
+    def uid(self):
+        return self.template.uid
+
+    @property
+    def calendar(self):
+        return self.template.calendar
+
+    @property
+    def calendar_name(self):
+        return self.template.calendar_name
+
+    @property
+    def source(self):
+        return self.template.source
+
+    @source.setter
+    def source(self, source):
+        self.template.source = source
+
+    def _ruleset(self):
+        if self._set is None:
+            dtstart = self.template.start.replace(tzinfo=None)
+            ruleset = rruleset()
+            # DTSTART siempre es la primera ocurrencia (rruleset ignora duplicados)
+            ruleset.rdate(dtstart)
+            for rule in self.rules:
+                ruleset.rrule(rrulestr(rule, dtstart=dtstart))
+            for rdate in self.rdates:
+                ruleset.rdate(rdate)
+            for exdate in self.exdates:
+                ruleset.exdate(exdate)
+            self._set = ruleset
+        return self._set
+
+    def _chunk(self, number):
+        """Ocurrencias con inicio en el tramo `number` (cacheado)"""
+        chunk = self._chunks.get(number)
+        if chunk is not None:
+            self._chunks.move_to_end(number)
+            return chunk
+
+        lo, hi = number * CHUNK, (number + 1) * CHUNK
+        # Límites en hora local aproximada: un día de margen cubre cualquier zona
+        naive_lo = datetime.fromtimestamp(lo - DAY, timezone.utc).replace(tzinfo=None)
+        naive_hi = datetime.fromtimestamp(hi + DAY, timezone.utc).replace(tzinfo=None)
+
+        template = self.template
+        tz = template.start.tzinfo
+        duration = template.end - template.start
+        chunk = []
+        for naive in self._ruleset().xafter(naive_lo, inc=True):
+            if naive > naive_hi or len(chunk) >= MAX_PER_CHUNK:
+                break
+            start = localize(naive, tz)
+            if lo <= start.timestamp() < hi:
+                chunk.append(template.occurrence(start, start + duration))
+
+        self._chunks[number] = chunk
+        if len(self._chunks) > MAX_CHUNKS:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def occurrences(self, lo=None, hi=None, include_lo=True, skip=()):
+        """Genera las ocurrencias con lo <= inicio <= hi (marcas Unix), en orden"""
+        if lo is None:
+            lo = self.template.timestamp
+        if hi is None:
+            hi = lo + HORIZON
+        for number in range(int(lo // CHUNK), int(hi // CHUNK) + 1):
+            for event in self._chunk(number):
+                timestamp = event.timestamp
+                if timestamp > hi:
+                    return
+                if (timestamp > lo or (include_lo and timestamp == lo)) and timestamp not in skip:
+                    yield event
+
+    def next_occurrence(self, after, skip=()):
+        """Primera ocurrencia con inicio posterior a `after` (marca Unix), o None"""
+        return next(self.occurrences(after, include_lo=False, skip=skip), None)
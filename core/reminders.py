@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import itertools
+
+from core.recurrence import Series
+
+# Margen para avisar con algo de retraso (bucle ocupado, reconexión...)
+GRACE = 60
+
+
+class ReminderQueue:
+    """Próximos avisos de eventos del calendario en un montículo por hora de aviso.
+
+    Cada evento (o serie, por su próxima ocurrencia) tiene una única entrada,
+    identificada por la misma clave que en los índices del calendario, así
+    que cada sincronización solo añade o quita lo que cambió, O(log n) por
+    evento. El bucle de avisos solo mira la cima: duerme hasta la siguiente
+    hora de aviso o hasta que `changed` indique que la cola cambió. Las
+    entradas de eventos quitados se descartan al llegar a la cima (borrado
+    perezoso).
+    """
+
+    def __init__(self, lead, overrides=lambda series: ()):
+        self.lead = lead
+        self.overrides = overrides
+        self.changed = asyncio.Event()
+        self._heap = []
+        self._entries = {}
+        self._sent = {}
+        self._stale = 0
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _push(self, key, event, series, now):
+        if series is not None:
+            # Primera ocurrencia cuyo aviso no ha pasado y que no se avisó ya
+            after = now + self.lead - GRACE
+            after = max(after, self._sent.get(key, after))
+            event = series.next_occurrence(after, self.overrides(series))
+            if event is None:
+                return
+        elif event.timestamp - self.lead < now - GRACE or self._sent.get(key) == event.timestamp:
+            return
+
+        entry = (event.timestamp - self.lead, next(self._counter), key)
+        self._entries[key] = (entry[1], event, series)
+        heapq.heappush(self._heap, entry)
+        self.changed.set()
+
+    def schedule(self, key, event, now):
+        """Programa el aviso de un evento o serie (sustituye al anterior con esa clave)"""
+        self.remove(key)
+        if isinstance(event, Series):
+            self._push(key, None, event, now)
+        else:
+            self._push(key, event, None, now)
+
+    def remove(self, key):
+        """Quita el aviso de un evento. Su entrada en el montículo queda obsoleta"""
+        if self._entries.pop(key, None) is not None:
+            self._stale += 1
+            if self._stale > len(self._entries) + 64:
+                self._compact()
+
+    def _compact(self):
+        """Reconstruye el montículo sin las entradas obsoletas"""
+        self._heap = [entry for entry in self._heap if self._current(entry)]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _current(self, entry):
+        current = self._entries.get(entry[2])
+        return current is not None and current[0] == entry[1]
+
+    def next_deadline(self):
+        """Hora (marca Unix) del próximo aviso, o None si no hay ninguno"""
+        while self._heap and not self._current(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._stale = max(self._stale - 1, 0)
+        return self._heap[0][0] if self._heap else None
+
+    def due(self, now):
+        """Saca y devuelve los eventos cuyo aviso ya toca; las series pasan a su siguiente ocurrencia"""
+        due = []
+        while self.next_deadline() is not None and self._heap[0][0] <= now:
+            fire_at, _, key = heapq.heappop(self._heap)
+            _, event, series = self._entries.pop(key)
+            self._sent[key] = event.timestamp
+            # Si el aviso llega tarde solo se manda si el evento no ha empezado
+            skipped = series is not None and event.timestamp in self.overrides(series)
+            if not skipped and (now < event.timestamp or now - fire_at <= GRACE):
+                due.append(event)
+            if series is not None:
+                self._push(key, None, series, now)
+
+        # Lo ya avisado solo importa mientras el evento no haya empezado
+        if len(self._sent) > 2 * len(self._entries) + 64:
+            self._sent = {key: start for key, start in self._sent.items() if start > now}
+        return due
@@ -0,0 +1,114 @@
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Registro binario: marca Unix (float64), símbolo (SYMBOL_SIZE bytes ASCII), precio (float64).
+# struct recorta en silencio los símbolos más largos: `core/coins.py` los rechaza al arrancar
+SYMBOL_SIZE = 4
+RECORD = struct.Struct(f"<d{SYMBOL_SIZE}sd")
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+
+class PriceSeries:
+    """Serie temporal de precios, de solo anexado, en un archivo binario.
+
+    Cada tick añade registros de tamaño fijo al final del archivo (nunca se
+    reescribe). En memoria se guardan dos `array` paralelos por moneda
+    (marcas de tiempo y precios), ordenados por tiempo, así que anexar es
+    O(1) y las consultas por rango usan bisect en O(log n).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._times = {}
+        self._prices = {}
+        self.records = 0
+
+    def load(self):
+        """Lee el archivo completo (una vez, al arrancar)"""
+        self._times = {}
+        self._prices = {}
+        self.records = 0
+
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            # Un registro incompleto al final (corte a mitad de escritura) se ignora
+            usable = len(data) - len(data) % RECORD.size
+            for timestamp, symbol, price in RECORD.iter_unpack(data[:usable]):
+                self._add(symbol.rstrip(b"\0").decode("ascii"), timestamp, price)
+            print(f"✅ Serie de precios cargada ({self.records} registros)")
+        except Exception as e:
+            print(f"❌ Error al cargar la serie de precios: {e}")
+
+    def _add(self, crypto, timestamp, price):
+        if crypto not in self._times:
+            self._times[crypto] = array("d")
+            self._prices[crypto] = array("d")
+        self._times[crypto].append(timestamp)
+        self._prices[crypto].append(price)
+        self.records += 1
+
+    def append(self, prices, timestamp=None):
+        """Anexa un tick {moneda: precio} al archivo y a memoria"""
+        timestamp = timestamp or time.time()
+        payload = b"".join(
+            RECORD.pack(timestamp, crypto.encode("ascii"), float(price))
+            for crypto, price in prices.items()
+        )
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(payload)
+        except Exception as e:
+            print(f"❌ Error al anexar a la serie de precios: {e}")
+
+        for crypto, price in prices.items():
+            self._add(crypto, timestamp, float(price))
+
+    def range(self, crypto, start, end=None):
+        """Lista de (marca, precio) con start <= marca <= end"""
+        times = self._times.get(crypto)
+        if not times:
+            return []
+        lo = bisect_left(times, start)
+        hi = bisect_right(times, end) if end is not None else len(times)
+        return list(zip(times[lo:hi], self._prices[crypto][lo:hi]))
+
+    def price_at(self, crypto, timestamp):
+        """Último precio conocido en `timestamp` (o el primero si es anterior a la serie)"""
+        times = self._times.get(crypto)
+        if not times:
+            return None
+        index = bisect_right(times, timestamp) - 1
+        return self._prices[crypto][max(index, 0)]
+
+    def latest(self, crypto):
+        prices = self._prices.get(crypto)
+        return prices[-1] if prices else None
+
+    def change_percent(self, crypto, window, now=None):
+        """Variación porcentual del último precio respecto al de hace `window` segundos"""
+        current = self.latest(crypto)
+        if current is None:
+            return 0.0
+        reference = self.price_at(crypto, (now or time.time()) - window)
+        if not reference:
+            return 0.0
+        return (current - reference) / reference * 100
+
+    def changes(self, crypto, now=None):
+        """Variaciones de 1h, 24h y 7d"""
+        return {
+            "1h": self.change_percent(crypto, HOUR, now),
+            "24h": self.change_percent(crypto, DAY, now),
+            "7d": self.change_percent(crypto, WEEK, now),
+        }
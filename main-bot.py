@@ -7,18 +7,27 @@ from dotenv import load_dotenv
 import subprocess
 import shutil
 from datetime import datetime
-from supabase import create_client, Client
 import postgrest
 import time
 from flask import Flask, render_template_string
 import threading
+from core.database import Database
+from core.leaderboard import LeaderboardPublisher
+from core.ranking import BalanceIndex
+from core.holdings import HoldingsBook
+from core.networth import NetWorthIndex
+from core.coins import SYMBOLS
 
 # ------------------------- CONFIGURACIÓN DEL BOT ---------------------------
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-INITIAL_BALANCE = 500
+CHANNEL_LEADERBOARD_ID = int(os.getenv("CHANNEL_LEADERBOARD_ID", "0"))
+LEADERBOARD_REFRESH_SECONDS = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", "30"))
+RANKING_RECONCILE_SECONDS = int(os.getenv("RANKING_RECONCILE_SECONDS", "600"))
+PLAYER_CACHE_SIZE = int(os.getenv("PLAYER_CACHE_SIZE", "5000"))
+PLAYER_CACHE_TTL = int(os.getenv("PLAYER_CACHE_TTL", "60"))
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -26,9 +35,22 @@ intents.members = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
-# Inicializar cliente de Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-bot.supabase = supabase  # Hacerlo disponible para otros cogs
+# Repositorio asíncrono compartido (un único pool HTTP hacia Supabase)
+bot.db = Database(SUPABASE_URL, SUPABASE_KEY, cache_size=PLAYER_CACHE_SIZE, cache_ttl=PLAYER_CACHE_TTL)  # Disponible para todos los cogs
+
+# Índice de balances y agregados globales en memoria (se alimenta de bot.db)
+bot.ranking = BalanceIndex(RANKING_RECONCILE_SECONDS)
+bot.db.add_balance_listener(bot.ranking.set)
+
+# Tenencias de criptomonedas en memoria (matriz usuarios × monedas)
+bot.holdings = HoldingsBook(SYMBOLS)
+bot.db.add_holdings_listener(bot.holdings.update)
+
+# Patrimonio (monedas + cripto) revaluado en cada tick de precios
+bot.networth = NetWorthIndex()
+
+# Leaderboard global: los comandos llaman a bot.leaderboard.mark_dirty()
+bot.leaderboard = LeaderboardPublisher(bot, CHANNEL_LEADERBOARD_ID, LEADERBOARD_REFRESH_SECONDS)
 
 # ------------------------- SERVIDOR WEB FLASK -----------------------------
 app = Flask(__name__)
@@ -298,7 +320,15 @@ def health():
 
 @app.route('/api/stats')
 def stats():
-    return bot_status
+    return {
+        **bot_status,
+        "database": bot.db.stats(),
+        "leaderboard": bot.leaderboard.stats(),
+        "ranking": bot.ranking.stats(),
+        "prices": bot.prices.stats() if hasattr(bot, "prices") else None,
+        "networth": bot.networth.stats(),
+        "orders": bot.orders.stats() if hasattr(bot, "orders") else None
+    }
 
 def run_web_server():
     """Inicia el servidor web Flask"""
@@ -310,133 +340,6 @@ web_thread = threading.Thread(target=run_web_server, daemon=True)
 web_thread.start()
 # ---------------------------------------------------------------------------
 
-# --------------------- FUNCIONES DE BASE DE DATOS --------------------------
-def get_player(discord_id, username):
-    """Obtiene o crea un jugador en Supabase"""
-    try:
-        # Intentar obtener el jugador
-        response = supabase.table("players")\
-            .select("*")\
-            .eq("discord_id", str(discord_id))\
-            .execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        else:
-            # Crear nuevo jugador
-            new_player = {
-                "discord_id": str(discord_id),
-                "username": username,
-                "balance": INITIAL_BALANCE,
-                "daily_streak": 0,
-                "created_at": datetime.now().isoformat()
-            }
-            response = supabase.table("players").insert(new_player).execute()
-            
-            # También crear wallet de criptomonedas si no existe
-            try:
-                supabase.table("crypto_wallets")\
-                    .select("*")\
-                    .eq("discord_id", str(discord_id))\
-                    .execute()
-            except:
-                new_wallet = {
-                    "discord_id": str(discord_id),
-                    "btc_balance": 0,
-                    "eth_balance": 0,
-                    "dog_balance": 0,
-                    "total_invested": 0,
-                    "total_withdrawn": 0
-                }
-                supabase.table("crypto_wallets").insert(new_wallet).execute()
-            
-            return response.data[0] if response.data else None
-            
-    except Exception as e:
-        print(f"❌ Error en get_player: {e}")
-        return None
-
-def update_balance(discord_id, amount):
-    """Actualiza el balance de un jugador en Supabase"""
-    try:
-        # Primero obtener el balance actual
-        response = supabase.table("players")\
-            .select("balance")\
-            .eq("discord_id", str(discord_id))\
-            .execute()
-        
-        if response.data and len(response.data) > 0:
-            current_balance = response.data[0]["balance"]
-            new_balance = current_balance + amount
-            
-            # Actualizar balance
-            supabase.table("players")\
-                .update({"balance": new_balance})\
-                .eq("discord_id", str(discord_id))\
-                .execute()
-            
-            return new_balance
-        else:
-            # Si no existe el jugador, crearlo primero
-            from discord.utils import get
-            guild = bot.guilds[0] if bot.guilds else None
-            member = guild.get_member(int(discord_id)) if guild else None
-            username = member.name if member else "Unknown"
-            
-            get_player(discord_id, username)
-            return amount + INITIAL_BALANCE  # Balance inicial + lo ganado
-            
-    except Exception as e:
-        print(f"❌ Error en update_balance: {e}")
-        return None
-
-def get_leaderboard():
-    """Obtiene el leaderboard desde Supabase"""
-    try:
-        response = supabase.table("players")\
-            .select("username, balance, discord_id")\
-            .order("balance", desc=True)\
-            .limit(10)\
-            .execute()
-        
-        return response.data
-    except Exception as e:
-        print(f"❌ Error en get_leaderboard: {e}")
-        return []
-
-def get_crypto_wallet(discord_id):
-    """Obtiene la wallet de criptomonedas de un usuario"""
-    try:
-        response = supabase.table("crypto_wallets")\
-            .select("*")\
-            .eq("discord_id", str(discord_id))\
-            .execute()
-        
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        else:
-            # Crear wallet si no existe
-            new_wallet = {
-                "discord_id": str(discord_id),
-                "btc_balance": 0,
-                "eth_balance": 0,
-                "dog_balance": 0,
-                "total_invested": 0,
-                "total_withdrawn": 0
-            }
-            supabase.table("crypto_wallets").insert(new_wallet).execute()
-            return new_wallet
-    except Exception as e:
-        print(f"❌ Error en get_crypto_wallet: {e}")
-        return None
-
-# Hacer funciones disponibles globalmente
-bot.get_player = get_player
-bot.update_balance = update_balance
-bot.get_leaderboard = get_leaderboard
-bot.get_crypto_wallet = get_crypto_wallet
-# ---------------------------------------------------------------------------
-
 # --------------------- CARGA DE COGS ------------------------
 async def load_juegos():
     for filename in os.listdir("./cog/juegos"):
@@ -514,6 +417,10 @@ async def start_background_tasks():
     """Inicia tareas en segundo plano"""
     # Ejemplo: Actualizar precios cada hora
     bot.loop.create_task(update_crypto_prices_loop())
+    bot.leaderboard.start()
+    bot.ranking.start(bot.db)
+    if not bot.holdings.loaded:
+        bot.loop.create_task(bot.holdings.load(bot.db))
     print("✅ Tareas en segundo plano iniciadas")
 
 async def update_crypto_prices_loop():